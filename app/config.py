@@ -13,15 +13,92 @@ class Settings:
     yandex_folder_id: str = ""
     yandex_iam_token: str = ""
     ocr_lang: str = "rus+eng"
+    ocr_workers: int = 4
+    ocr_dpi: int = 200
+    ocr_grayscale: bool = True
+    ocr_page_window: int = 8
+    ocr_min_text_chars: int = 20
+    ocr_rasterize_to_disk: bool = True
     max_upload_size_mb: int = 50
+    batch_max_files: int = 500
+    batch_max_upload_size_mb: int = 1024
+    batch_max_unpacked_size_mb: int = 2048
+    batch_max_zip_ratio: int = 100
     temp_dir: Path = Path("./temp")
+    result_ttl_seconds: int = 60 * 60 * 24
+    reaper_interval_seconds: float = 60.0
+    reaper_batch_size: int = 200
     mask_style: str = "asterisks"
+    preview_cache_entries: int = 256
     chunk_size: int = 6000
+    chunk_overlap: int = 200
+    chunk_token_budget: int = 0
+    chunk_chars_per_token: float = 3.0
+    gpt_concurrency: int = 4
+    gpt_timeout_seconds: float = 60.0
+    gpt_max_connections: int = 20
+    gpt_max_keepalive_connections: int = 10
+    gpt_keepalive_expiry_seconds: float = 30.0
+    gpt_max_retries: int = 3
+    gpt_backoff_base_seconds: float = 0.5
+    gpt_backoff_max_seconds: float = 20.0
+    gpt_pack_threshold: int = 1500
+    gpt_pack_window_ms: float = 50.0
+    gpt_stream: bool = True
+    gpt_response_format: str = "compact"
+    gpt_max_tokens: int = 2000
+    gpt_min_tokens: int = 200
+    gpt_entity_density: float = 5.0
+    gpt_resplit_depth: int = 3
+    gpt_resplit_min_chars: int = 400
+    gpt_breaker_window: int = 20
+    gpt_breaker_min_calls: int = 5
+    gpt_breaker_failure_rate: float = 0.5
+    gpt_breaker_slow_call_seconds: float = 20.0
+    gpt_breaker_slow_call_rate: float = 0.5
+    gpt_breaker_open_seconds: float = 30.0
+    gpt_breaker_half_open_calls: int = 1
+    degraded_detector: str = "regex"
+    progress_history_events: int = 2000
+    progress_retention_seconds: float = 300.0
+    job_workers: int = 2
+    stage_workers: int = 4
+    stage_queue_size: int = 32
+    local_detection: bool = True
+    entity_propagation: bool = True
+    detection_cache_entries: int = 2048
+    detection_cache_disk: bool = False
+    detection_cache_disk_mb: int = 200
+    detection_cache_ttl_seconds: int = 60 * 60 * 24 * 7
+
+    @property
+    def results_db_path(self) -> Path:
+        return self.temp_dir / "db" / "results.sqlite3"
+
+    @property
+    def jobs_dir(self) -> Path:
+        return self.temp_dir / "jobs"
+
+    @property
+    def batches_dir(self) -> Path:
+        return self.temp_dir / "batches"
+
+    @property
+    def detection_cache_dir(self) -> Path:
+        return self.temp_dir / "detection_cache"
 
     @property
     def max_upload_size_bytes(self) -> int:
         return self.max_upload_size_mb * 1024 * 1024
 
+    @property
+    def batch_max_upload_size_bytes(self) -> int:
+        return self.batch_max_upload_size_mb * 1024 * 1024
+
+    @property
+    def batch_max_unpacked_size_bytes(self) -> int:
+        return self.batch_max_unpacked_size_mb * 1024 * 1024
+
 
 def load_settings() -> Settings:
     load_dotenv()
@@ -35,8 +112,68 @@ def load_settings() -> Settings:
         yandex_folder_id=os.getenv("YANDEX_FOLDER_ID", ""),
         yandex_iam_token=os.getenv("YANDEX_IAM_TOKEN", ""),
         ocr_lang=os.getenv("OCR_LANG", "rus+eng"),
+        ocr_workers=int(os.getenv("OCR_WORKERS", str(min(4, os.cpu_count() or 1)))),
+        ocr_dpi=int(os.getenv("OCR_DPI", "200")),
+        ocr_grayscale=_env_flag("OCR_GRAYSCALE", True),
+        ocr_page_window=int(os.getenv("OCR_PAGE_WINDOW", "8")),
+        ocr_min_text_chars=int(os.getenv("OCR_MIN_TEXT_CHARS", "20")),
+        ocr_rasterize_to_disk=_env_flag("OCR_RASTERIZE_TO_DISK", True),
         max_upload_size_mb=int(os.getenv("MAX_UPLOAD_SIZE_MB", "50")),
+        batch_max_files=int(os.getenv("BATCH_MAX_FILES", "500")),
+        batch_max_upload_size_mb=int(os.getenv("BATCH_MAX_UPLOAD_SIZE_MB", "1024")),
+        batch_max_unpacked_size_mb=int(os.getenv("BATCH_MAX_UNPACKED_SIZE_MB", "2048")),
+        batch_max_zip_ratio=int(os.getenv("BATCH_MAX_ZIP_RATIO", "100")),
         temp_dir=Path(os.getenv("TEMP_DIR", "./temp")),
+        result_ttl_seconds=int(os.getenv("RESULT_TTL_SECONDS", str(60 * 60 * 24))),
+        reaper_interval_seconds=float(os.getenv("REAPER_INTERVAL_SECONDS", "60")),
+        reaper_batch_size=int(os.getenv("REAPER_BATCH_SIZE", "200")),
         mask_style=os.getenv("MASK_STYLE", "asterisks"),
+        preview_cache_entries=int(os.getenv("PREVIEW_CACHE_ENTRIES", "256")),
         chunk_size=int(os.getenv("CHUNK_SIZE", "6000")),
+        chunk_overlap=int(os.getenv("CHUNK_OVERLAP", "200")),
+        chunk_token_budget=int(os.getenv("CHUNK_TOKEN_BUDGET", "0")),
+        chunk_chars_per_token=float(os.getenv("CHUNK_CHARS_PER_TOKEN", "3.0")),
+        gpt_concurrency=int(os.getenv("GPT_CONCURRENCY", "4")),
+        gpt_timeout_seconds=float(os.getenv("GPT_TIMEOUT_SECONDS", "60")),
+        gpt_max_connections=int(os.getenv("GPT_MAX_CONNECTIONS", "20")),
+        gpt_max_keepalive_connections=int(os.getenv("GPT_MAX_KEEPALIVE_CONNECTIONS", "10")),
+        gpt_keepalive_expiry_seconds=float(os.getenv("GPT_KEEPALIVE_EXPIRY_SECONDS", "30")),
+        gpt_max_retries=int(os.getenv("GPT_MAX_RETRIES", "3")),
+        gpt_backoff_base_seconds=float(os.getenv("GPT_BACKOFF_BASE_SECONDS", "0.5")),
+        gpt_backoff_max_seconds=float(os.getenv("GPT_BACKOFF_MAX_SECONDS", "20")),
+        gpt_pack_threshold=int(os.getenv("GPT_PACK_THRESHOLD", "1500")),
+        gpt_pack_window_ms=float(os.getenv("GPT_PACK_WINDOW_MS", "50")),
+        gpt_stream=_env_flag("GPT_STREAM", True),
+        gpt_response_format=os.getenv("GPT_RESPONSE_FORMAT", "compact"),
+        gpt_max_tokens=int(os.getenv("GPT_MAX_TOKENS", "2000")),
+        gpt_min_tokens=int(os.getenv("GPT_MIN_TOKENS", "200")),
+        gpt_entity_density=float(os.getenv("GPT_ENTITY_DENSITY", "5")),
+        gpt_resplit_depth=int(os.getenv("GPT_RESPLIT_DEPTH", "3")),
+        gpt_resplit_min_chars=int(os.getenv("GPT_RESPLIT_MIN_CHARS", "400")),
+        gpt_breaker_window=int(os.getenv("GPT_BREAKER_WINDOW", "20")),
+        gpt_breaker_min_calls=int(os.getenv("GPT_BREAKER_MIN_CALLS", "5")),
+        gpt_breaker_failure_rate=float(os.getenv("GPT_BREAKER_FAILURE_RATE", "0.5")),
+        gpt_breaker_slow_call_seconds=float(os.getenv("GPT_BREAKER_SLOW_CALL_SECONDS", "20")),
+        gpt_breaker_slow_call_rate=float(os.getenv("GPT_BREAKER_SLOW_CALL_RATE", "0.5")),
+        gpt_breaker_open_seconds=float(os.getenv("GPT_BREAKER_OPEN_SECONDS", "30")),
+        gpt_breaker_half_open_calls=int(os.getenv("GPT_BREAKER_HALF_OPEN_CALLS", "1")),
+        degraded_detector=os.getenv("DEGRADED_DETECTOR", "regex"),
+        progress_history_events=int(os.getenv("PROGRESS_HISTORY_EVENTS", "2000")),
+        progress_retention_seconds=float(os.getenv("PROGRESS_RETENTION_SECONDS", "300")),
+        job_workers=int(os.getenv("JOB_WORKERS", "2")),
+        stage_workers=int(os.getenv("STAGE_WORKERS", "4")),
+        stage_queue_size=int(os.getenv("STAGE_QUEUE_SIZE", "32")),
+        local_detection=_env_flag("LOCAL_DETECTION", True),
+        entity_propagation=_env_flag("ENTITY_PROPAGATION", True),
+        detection_cache_entries=int(os.getenv("DETECTION_CACHE_ENTRIES", "2048")),
+        detection_cache_disk=_env_flag("DETECTION_CACHE_DISK", False),
+        detection_cache_disk_mb=int(os.getenv("DETECTION_CACHE_DISK_MB", "200")),
+        detection_cache_ttl_seconds=int(os.getenv("DETECTION_CACHE_TTL_SECONDS", str(60 * 60 * 24 * 7))),
     )
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
@@ -1,10 +1,56 @@
+from contextlib import asynccontextmanager
+from functools import partial
+
+from fastapi import FastAPI
+
 from app.config import Settings, load_settings
+from app.services import pipeline
+from app.services.batches import BatchStore
+from app.services.detection_cache import DetectionCache
+from app.services.executor import StageExecutor
 from app.services.file_storage import FileStorageService
+from app.services.jobs import JobQueue
+from app.services.preview import FragmentCache
+from app.services.progress import ProgressHub
+from app.services.reaper import TempReaper
 from app.services.yandex_gpt import YandexGPTClient
 
 settings = load_settings()
-storage = FileStorageService(settings.temp_dir)
-gpt_client = YandexGPTClient(settings)
+storage = FileStorageService(
+    settings.temp_dir,
+    results_db_path=settings.results_db_path,
+    ttl_seconds=settings.result_ttl_seconds,
+)
+reaper = TempReaper(
+    storage.expiry,
+    on_reaped=storage.forget_results,
+    interval_seconds=settings.reaper_interval_seconds,
+    batch_size=settings.reaper_batch_size,
+)
+detection_cache = DetectionCache(
+    max_entries=settings.detection_cache_entries,
+    disk_dir=settings.detection_cache_dir if settings.detection_cache_disk else None,
+    disk_max_bytes=settings.detection_cache_disk_mb * 1024 * 1024,
+    ttl_seconds=settings.detection_cache_ttl_seconds,
+)
+batch_store = BatchStore(settings.batches_dir)
+preview_cache = FragmentCache(settings.preview_cache_entries)
+progress_hub = ProgressHub(settings.progress_history_events, settings.progress_retention_seconds)
+stage_executor = StageExecutor(settings.stage_workers, max_pending=settings.stage_queue_size)
+gpt_client = YandexGPTClient(settings, cache=detection_cache, executor=stage_executor)
+job_queue = JobQueue(
+    settings.jobs_dir,
+    workers=settings.job_workers,
+    handler=partial(
+        pipeline.process_job,
+        settings=settings,
+        storage=storage,
+        gpt_client=gpt_client,
+        executor=stage_executor,
+        progress=progress_hub,
+    ),
+    on_change=progress_hub.job_changed,
+)
 
 
 def get_settings() -> Settings:
@@ -17,3 +63,45 @@ def get_storage() -> FileStorageService:
 
 def get_gpt_client() -> YandexGPTClient:
     return gpt_client
+
+
+def get_detection_cache() -> DetectionCache:
+    return detection_cache
+
+
+def get_job_queue() -> JobQueue:
+    return job_queue
+
+
+def get_batch_store() -> BatchStore:
+    return batch_store
+
+
+def get_progress_hub() -> ProgressHub:
+    return progress_hub
+
+
+def get_preview_cache() -> FragmentCache:
+    return preview_cache
+
+
+def get_reaper() -> TempReaper:
+    return reaper
+
+
+def get_stage_executor() -> StageExecutor:
+    return stage_executor
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await gpt_client.start()
+    await job_queue.start()
+    await reaper.start()
+    try:
+        yield
+    finally:
+        await reaper.stop()
+        await job_queue.stop()
+        await gpt_client.aclose()
+        stage_executor.shutdown()
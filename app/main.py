@@ -3,20 +3,32 @@ import logging
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 
-from app.dependencies import settings, storage
-from app.routers import download, preview, upload
+from app.dependencies import lifespan, settings
+from app.middleware import UploadSizeLimitMiddleware
+from app.routers import batches, download, jobs, preview, status, upload
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
 
-app = FastAPI(title="Web-сервис маскирования ПД")
+app = FastAPI(title="Web-сервис маскирования ПД", lifespan=lifespan)
+
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_upload_bytes=settings.max_upload_size_bytes,
+    detail=upload.UPLOAD_TOO_LARGE_DETAIL,
+)
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_upload_bytes=settings.batch_max_upload_size_bytes,
+    detail=batches.BATCH_TOO_LARGE_DETAIL,
+    paths=("/batches",),
+)
 
 app.include_router(upload.router)
+app.include_router(jobs.router)
+app.include_router(batches.router)
 app.include_router(preview.router)
 app.include_router(download.router)
+app.include_router(status.router)
 
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
-
-@app.on_event("startup")
-async def startup_cleanup():
-    storage.cleanup()
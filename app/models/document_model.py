@@ -1,4 +1,7 @@
-from dataclasses import dataclass
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
 from typing import List, Optional
 
 
@@ -7,14 +10,52 @@ class TextBlock:
     page: Optional[int]
     text: str
     start_offset: int
+    ocr: bool = False
 
 
 @dataclass
 class DocumentModel:
-    blocks: List[TextBlock]
-    full_text: str
+    blocks: List[TextBlock] = field(default_factory=list)
+    ocr_failed_pages: List[int] = field(default_factory=list)
 
     @classmethod
-    def from_blocks(cls, blocks: List[TextBlock]) -> "DocumentModel":
-        full_text = "".join(block.text for block in blocks)
-        return cls(blocks=blocks, full_text=full_text)
+    def from_blocks(cls, blocks: List[TextBlock], ocr_failed_pages: Optional[List[int]] = None) -> "DocumentModel":
+        return cls(blocks=blocks, ocr_failed_pages=ocr_failed_pages or [])
+
+    @property
+    def full_text(self) -> str:
+        return "".join(block.text for block in self.blocks)
+
+    @property
+    def length(self) -> int:
+        if not self.blocks:
+            return 0
+        last = self.blocks[-1]
+        return last.start_offset + len(last.text)
+
+    @cached_property
+    def block_starts(self) -> List[int]:
+        return [block.start_offset for block in self.blocks]
+
+    def block_index(self, offset: int) -> int:
+        return max(0, bisect_right(self.block_starts, offset) - 1)
+
+    def slice(self, start: int, end: int) -> str:
+        parts = []
+        index = self.block_index(start)
+        while index < len(self.blocks) and self.blocks[index].start_offset < end:
+            block = self.blocks[index]
+            parts.append(block.text[max(0, start - block.start_offset) : max(0, end - block.start_offset)])
+            index += 1
+        return "".join(parts)
+
+
+@dataclass
+class OcrOptions:
+    lang: str = "rus+eng"
+    workers: int = 1
+    dpi: int = 200
+    grayscale: bool = True
+    page_window: int = 8
+    min_text_chars: int = 20
+    output_dir: Optional[Path] = None
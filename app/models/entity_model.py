@@ -4,6 +4,8 @@ from typing import List
 
 @dataclass
 class SensitiveEntity:
+    __slots__ = ("type", "text", "start", "end")
+
     type: str
     text: str
     start: int
@@ -15,9 +17,12 @@ class MaskingOptions:
     style: str = "asterisks"  # asterisks or tags
 
     def render_mask(self, entity: SensitiveEntity) -> str:
+        return self.render(entity.type, entity.end - entity.start)
+
+    def render(self, entity_type: str, length: int) -> str:
         if self.style == "tags":
-            return f"[{entity.type}]"
-        return "*" * max(len(entity.text), entity.end - entity.start)
+            return f"[{entity_type}]"
+        return "*" * max(1, length)
 
 
 def sort_entities(entities: List[SensitiveEntity]) -> List[SensitiveEntity]:
@@ -0,0 +1,179 @@
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from app.models.entity_model import SensitiveEntity
+
+MAGIC = b"ENS1"
+HEADER = struct.Struct("<4sII")
+TYPE_ID_CODE = "H"
+OFFSET_CODE = "I"
+LENGTH_CODE = "I"
+
+Span = Tuple[int, int, str]
+
+
+class EntitySet:
+    __slots__ = ("types", "type_ids", "starts", "ends", "texts", "_type_index", "_spans", "_max_length")
+
+    def __init__(
+        self,
+        types: Optional[List[str]] = None,
+        type_ids: Optional[array] = None,
+        starts: Optional[array] = None,
+        ends: Optional[array] = None,
+        texts: Optional[List[str]] = None,
+    ):
+        self.types: List[str] = types if types is not None else []
+        self.type_ids = type_ids if type_ids is not None else array(TYPE_ID_CODE)
+        self.starts = starts if starts is not None else array(OFFSET_CODE)
+        self.ends = ends if ends is not None else array(OFFSET_CODE)
+        self.texts: List[str] = texts if texts is not None else []
+        self._type_index = {name: index for index, name in enumerate(self.types)}
+        self._spans: Optional[EntitySet] = None
+        self._max_length: Optional[int] = None
+
+    @classmethod
+    def from_entities(cls, entities: Iterable[SensitiveEntity]) -> "EntitySet":
+        if isinstance(entities, EntitySet):
+            return entities
+        result = cls()
+        for entity in sorted(entities, key=lambda item: (item.start, item.end)):
+            result._append(entity.type, entity.start, entity.end, entity.text)
+        return result
+
+    @classmethod
+    def concat(cls, sets: Sequence["EntitySet"]) -> "EntitySet":
+        result = cls()
+        for part in sets:
+            remap = [result._type_id(name) for name in part.types]
+            result.type_ids.extend(remap[type_id] for type_id in part.type_ids)
+            result.starts.extend(part.starts)
+            result.ends.extend(part.ends)
+            result.texts.extend(part.texts)
+        if any(a > b for a, b in zip(result.starts, result.starts[1:])):
+            return cls.from_entities(result)
+        return result
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __iter__(self) -> Iterator[SensitiveEntity]:
+        for index in range(len(self.starts)):
+            yield self[index]
+
+    def __getitem__(self, index: int) -> SensitiveEntity:
+        return SensitiveEntity(
+            type=self.types[self.type_ids[index]],
+            text=self.texts[index],
+            start=self.starts[index],
+            end=self.ends[index],
+        )
+
+    def iter_spans(self) -> Iterator[Span]:
+        types = self.types
+        return zip(self.starts, self.ends, (types[type_id] for type_id in self.type_ids))
+
+    def spans(self) -> "EntitySet":
+        if self._spans is None:
+            spans = EntitySet(list(self.types))
+            cursor = 0
+            for index, (start, end) in enumerate(zip(self.starts, self.ends)):
+                if start < cursor or end <= start:
+                    continue
+                spans.type_ids.append(self.type_ids[index])
+                spans.starts.append(start)
+                spans.ends.append(end)
+                spans.texts.append(self.texts[index])
+                cursor = end
+            spans._spans = spans
+            self._spans = spans
+        return self._spans
+
+    def slice(self, low: int, high: int) -> "EntitySet":
+        return EntitySet(
+            list(self.types),
+            self.type_ids[low:high],
+            self.starts[low:high],
+            self.ends[low:high],
+            self.texts[low:high],
+        )
+
+    def overlapping(self, start: int, end: int) -> "EntitySet":
+        if self._max_length is None:
+            self._max_length = max((b - a for a, b in zip(self.starts, self.ends)), default=0)
+        low = bisect_left(self.starts, start - self._max_length)
+        high = bisect_left(self.starts, end)
+        result = EntitySet(list(self.types))
+        for index in range(low, high):
+            if self.ends[index] > start:
+                result.type_ids.append(self.type_ids[index])
+                result.starts.append(self.starts[index])
+                result.ends.append(self.ends[index])
+                result.texts.append(self.texts[index])
+        return result
+
+    def type_counts(self) -> Dict[str, int]:
+        return {self.types[type_id]: count for type_id, count in sorted(Counter(self.type_ids).items())}
+
+    def to_bytes(self) -> bytes:
+        types = "\n".join(self.types).encode("utf-8")
+        lengths = array(LENGTH_CODE, (len(text) for text in self.texts))
+        columns = [self.type_ids, self.starts, self.ends, lengths]
+        if sys.byteorder != "little":
+            columns = [_swapped(column) for column in columns]
+        texts = "".join(self.texts).encode("utf-8")
+        return b"".join(
+            [HEADER.pack(MAGIC, len(self), len(types)), types, *(column.tobytes() for column in columns), texts]
+        )
+
+    @classmethod
+    def from_bytes(cls, data: Union[bytes, memoryview]) -> "EntitySet":
+        magic, count, types_size = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("Unknown entity set format")
+        view = memoryview(data)[HEADER.size :]
+        types = bytes(view[:types_size]).decode("utf-8").split("\n") if types_size else []
+        view = view[types_size:]
+
+        columns = []
+        for code in (TYPE_ID_CODE, OFFSET_CODE, OFFSET_CODE, LENGTH_CODE):
+            column = array(code)
+            size = count * column.itemsize
+            column.frombytes(view[:size])
+            if sys.byteorder != "little":
+                column.byteswap()
+            columns.append(column)
+            view = view[size:]
+        type_ids, starts, ends, lengths = columns
+
+        joined = bytes(view).decode("utf-8")
+        texts = []
+        position = 0
+        for length in lengths:
+            texts.append(joined[position : position + length])
+            position += length
+        return cls(types, type_ids, starts, ends, texts)
+
+    def _append(self, type_name: str, start: int, end: int, text: str) -> None:
+        self.type_ids.append(self._type_id(type_name))
+        self.starts.append(start)
+        self.ends.append(end)
+        self.texts.append(text)
+
+    def _type_id(self, name: str) -> int:
+        type_id = self._type_index.get(name)
+        if type_id is None:
+            type_id = len(self.types)
+            self.types.append(name)
+            self._type_index[name] = type_id
+        return type_id
+
+
+def _swapped(column: array) -> array:
+    copy = array(column.typecode, column)
+    copy.byteswap()
+    return copy
@@ -2,7 +2,8 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import List, Dict, Any
 
-from app.models.entity_model import SensitiveEntity
+from app.models.document_model import DocumentModel
+from app.models.entity_set import EntitySet
 
 
 @dataclass
@@ -11,7 +12,17 @@ class ProcessingResult:
     original_filename: str
     uploaded_path: Path
     masked_path: Path
-    full_text: str
-    masked_text: str
-    entities: List[SensitiveEntity]
+    document: DocumentModel
+    masked_blocks: List[str]
+    entities: EntitySet
     gpt_logs: List[Dict[str, Any]]
+    content_hash: str = ""
+    degraded: bool = False
+
+    @property
+    def full_text(self) -> str:
+        return self.document.full_text
+
+    @property
+    def masked_text(self) -> str:
+        return "".join(self.masked_blocks)
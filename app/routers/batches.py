@@ -0,0 +1,164 @@
+import logging
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi.responses import FileResponse, JSONResponse
+from starlette import status
+
+from app.dependencies import get_batch_store, get_job_queue, get_settings, get_stage_executor, get_storage
+from app.services.batches import Batch, BatchItem, BatchStore, build_archive, ingest_uploads
+from app.services.executor import StageExecutor
+from app.services.file_storage import FileStorageService
+from app.services.jobs import STATUS_DONE, STATUS_FAILED, Job, JobQueue
+
+logger = logging.getLogger(__name__)
+
+BATCH_TOO_LARGE_DETAIL = "Пакет превышает максимальный размер загрузки."
+
+router = APIRouter()
+
+
+@router.post("/batches")
+async def create_batch(
+    files: List[UploadFile] = File(...),
+    settings=Depends(get_settings),
+    storage: FileStorageService = Depends(get_storage),
+    job_queue: JobQueue = Depends(get_job_queue),
+    batch_store: BatchStore = Depends(get_batch_store),
+    executor: StageExecutor = Depends(get_stage_executor),
+):
+    accepted, rejected = await executor.run(
+        "save_upload",
+        ingest_uploads,
+        files,
+        storage,
+        max_file_bytes=settings.max_upload_size_bytes,
+        max_files=settings.batch_max_files,
+        max_unpacked_bytes=settings.batch_max_unpacked_size_bytes,
+        max_zip_ratio=settings.batch_max_zip_ratio,
+    )
+    if not accepted:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": "Нет файлов для обработки.", "rejected": rejected},
+        )
+
+    batch = Batch(batch_id=batch_store.new_id(), rejected=rejected)
+    tracked = []
+    for item in accepted:
+        job = job_queue.submit(
+            Job(
+                job_id=item.stored.file_id,
+                file_id=item.stored.file_id,
+                original_filename=item.filename,
+                uploaded_path=item.stored.path,
+                content_type=item.content_type,
+                content_hash=item.stored.sha256,
+            )
+        )
+        batch.items.append(BatchItem(job_id=job.job_id, filename=item.filename))
+        tracked.append((job.file_id, [job_queue.job_path(job.job_id)]))
+
+    batch_path = await executor.run("save_batch", batch_store.save, batch)
+    await executor.run("track_files", _track_batch, storage, batch, batch_path, batch_store, tracked)
+    logger.info("Batch %s queued %s files, rejected %s", batch.batch_id, len(batch.items), len(rejected))
+
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={
+            "batch_id": batch.batch_id,
+            "status_url": f"/batches/{batch.batch_id}",
+            "download_url": f"/batches/{batch.batch_id}/download",
+            "files": [{"filename": item.filename, "job_id": item.job_id} for item in batch.items],
+            "rejected": rejected,
+        },
+    )
+
+
+@router.get("/batches/{batch_id}")
+async def batch_status(
+    batch_id: str,
+    job_queue: JobQueue = Depends(get_job_queue),
+    batch_store: BatchStore = Depends(get_batch_store),
+    executor: StageExecutor = Depends(get_stage_executor),
+):
+    batch = await _get_batch(batch_store, executor, batch_id)
+    jobs = await executor.run("load_jobs", _load_jobs, job_queue, batch)
+    counts = {STATUS_DONE: 0, STATUS_FAILED: 0}
+    for job in jobs.values():
+        if job.status in counts:
+            counts[job.status] += 1
+    finished = counts[STATUS_DONE] + counts[STATUS_FAILED] == len(batch.items)
+
+    return {
+        "batch_id": batch.batch_id,
+        "status": STATUS_DONE if finished else "running",
+        "total": len(batch.items),
+        "done": counts[STATUS_DONE],
+        "failed": counts[STATUS_FAILED],
+        "download_url": f"/batches/{batch.batch_id}/download" if finished else None,
+        "files": [
+            {
+                "filename": item.filename,
+                "job_id": item.job_id,
+                "status": jobs[item.job_id].status if item.job_id in jobs else STATUS_FAILED,
+                "stage": jobs[item.job_id].stage if item.job_id in jobs else "",
+                "error": jobs[item.job_id].error if item.job_id in jobs else "Задача не найдена",
+            }
+            for item in batch.items
+        ],
+        "rejected": batch.rejected,
+    }
+
+
+@router.get("/batches/{batch_id}/download")
+async def batch_download(
+    batch_id: str,
+    job_queue: JobQueue = Depends(get_job_queue),
+    storage: FileStorageService = Depends(get_storage),
+    batch_store: BatchStore = Depends(get_batch_store),
+    executor: StageExecutor = Depends(get_stage_executor),
+):
+    batch = await _get_batch(batch_store, executor, batch_id)
+    archive_path = batch_store.archive_path(batch.batch_id)
+    if not archive_path.exists():
+        jobs = await executor.run("load_jobs", _load_jobs, job_queue, batch)
+        if any(item.job_id in jobs and not jobs[item.job_id].finished for item in batch.items):
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Пакет ещё обрабатывается")
+        await executor.run("export", build_archive, batch, jobs, storage, archive_path)
+        await executor.run("track_files", storage.track_files, batch.batch_id, [archive_path])
+
+    return FileResponse(
+        path=archive_path,
+        filename=f"batch_{batch.batch_id}_masked.zip",
+        media_type="application/zip",
+    )
+
+
+async def _get_batch(batch_store: BatchStore, executor: StageExecutor, batch_id: str) -> Batch:
+    batch = await executor.run("load_batch", batch_store.get, batch_id)
+    if batch is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Пакет не найден")
+    return batch
+
+
+def _load_jobs(job_queue: JobQueue, batch: Batch) -> Dict[str, Job]:
+    jobs = {}
+    for item in batch.items:
+        job = job_queue.get(item.job_id)
+        if job is not None:
+            jobs[item.job_id] = job
+    return jobs
+
+
+def _track_batch(
+    storage: FileStorageService,
+    batch: Batch,
+    batch_path: Path,
+    batch_store: BatchStore,
+    tracked: List[Tuple[str, List[Path]]],
+) -> None:
+    for file_id, paths in tracked:
+        storage.track_files(file_id, paths)
+    storage.track_files(batch.batch_id, [batch_path, batch_store.archive_path(batch.batch_id)])
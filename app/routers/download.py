@@ -2,15 +2,20 @@ from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import FileResponse
 from starlette import status
 
-from app.dependencies import get_storage
+from app.dependencies import get_stage_executor, get_storage
+from app.services.executor import StageExecutor
 from app.services.file_storage import FileStorageService
 
 router = APIRouter()
 
 
 @router.get("/download/{file_id}")
-async def download(file_id: str, storage: FileStorageService = Depends(get_storage)):
-    result = storage.load_result(file_id)
+async def download(
+    file_id: str,
+    storage: FileStorageService = Depends(get_storage),
+    executor: StageExecutor = Depends(get_stage_executor),
+):
+    result = await executor.run("load_summary", storage.load_summary, file_id)
     if not result:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Файл не найден")
 
@@ -19,4 +24,5 @@ async def download(file_id: str, storage: FileStorageService = Depends(get_stora
         path=result.masked_path,
         filename=filename,
         media_type="application/octet-stream",
+        headers={"X-Masking-Degraded": "1"} if result.degraded else None,
     )
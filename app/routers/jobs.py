@@ -0,0 +1,144 @@
+import json
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import HTMLResponse, StreamingResponse
+from starlette import status
+from starlette.templating import Jinja2Templates
+
+from app.dependencies import get_job_queue, get_progress_hub, get_stage_executor, get_storage
+from app.services.executor import StageExecutor
+from app.services.file_storage import FileStorageService
+from app.services.jobs import STATUS_DONE, Job, JobQueue
+from app.services.progress import ProgressHub
+
+router = APIRouter()
+templates = Jinja2Templates(directory="app/templates")
+
+
+@router.get("/jobs")
+async def list_jobs(
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    content_hash: Optional[str] = None,
+    filename: Optional[str] = None,
+    storage: FileStorageService = Depends(get_storage),
+    executor: StageExecutor = Depends(get_stage_executor),
+):
+    results = await executor.run(
+        "list_results",
+        storage.results.list,
+        limit=limit,
+        offset=offset,
+        content_hash=content_hash,
+        filename=filename,
+    )
+    return [
+        {
+            "job_id": result.file_id,
+            "file_id": result.file_id,
+            "original_filename": result.original_filename,
+            "content_hash": result.content_hash,
+            "entity_count": result.entity_count,
+            "degraded": result.degraded,
+            "created_at": result.created_at,
+            "preview_url": f"/preview/{result.file_id}",
+            "download_url": f"/download/{result.file_id}",
+        }
+        for result in results
+    ]
+
+
+@router.get("/jobs/{job_id}")
+async def job_status(
+    job_id: str,
+    job_queue: JobQueue = Depends(get_job_queue),
+    executor: StageExecutor = Depends(get_stage_executor),
+):
+    job = await _get_job(job_queue, executor, job_id)
+    payload = {
+        "job_id": job.job_id,
+        "file_id": job.file_id,
+        "original_filename": job.original_filename,
+        "status": job.status,
+        "stage": job.stage,
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+    }
+    if job.status == STATUS_DONE:
+        payload["preview_url"] = f"/preview/{job.file_id}"
+        payload["download_url"] = f"/download/{job.file_id}"
+    return payload
+
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(
+    request: Request,
+    job_id: str,
+    last_event_id: int = Header(0),
+    job_queue: JobQueue = Depends(get_job_queue),
+    progress: ProgressHub = Depends(get_progress_hub),
+    executor: StageExecutor = Depends(get_stage_executor),
+):
+    job = await _get_job(job_queue, executor, job_id)
+    return StreamingResponse(
+        _event_stream(request, job, last_event_id, progress),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/jobs/{job_id}/view", response_class=HTMLResponse)
+async def job_view(
+    request: Request,
+    job_id: str,
+    job_queue: JobQueue = Depends(get_job_queue),
+    executor: StageExecutor = Depends(get_stage_executor),
+):
+    job = await _get_job(job_queue, executor, job_id)
+    return templates.TemplateResponse(
+        "job.html",
+        {
+            "request": request,
+            "job": job,
+        },
+    )
+
+
+async def _event_stream(request: Request, job: Job, last_event_id: int, progress: ProgressHub) -> AsyncIterator[str]:
+    yield "retry: 3000\n\n"
+    if job.finished and not progress.has_channel(job.job_id):
+        yield _sse("status", {"status": job.status, "stage": job.stage, "error": job.error}, _status_urls(job))
+        return
+
+    async for item in progress.subscribe(job.job_id, last_event_id):
+        if await request.is_disconnected():
+            return
+        if item is None:
+            yield ": ping\n\n"
+            continue
+        event_id, event, data = item
+        extra = _status_urls(job) if event == "status" and data.get("status") == STATUS_DONE else {}
+        yield _sse(event, data, extra, event_id)
+
+
+def _sse(event: str, data: dict, extra: dict, event_id: Optional[int] = None) -> str:
+    payload = json.dumps({**data, **extra}, ensure_ascii=False)
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}event: {event}\ndata: {payload}\n\n"
+
+
+def _status_urls(job: Job) -> dict:
+    if job.status != STATUS_DONE:
+        return {}
+    return {"preview_url": f"/preview/{job.file_id}", "download_url": f"/download/{job.file_id}"}
+
+
+async def _get_job(job_queue: JobQueue, executor: StageExecutor, job_id: str) -> Job:
+    job = job_queue.get_active(job_id)
+    if job is None:
+        job = await executor.run("load_job", job_queue.get, job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Задача не найдена")
+    return job
@@ -1,11 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+import hashlib
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from fastapi.responses import HTMLResponse
 from starlette import status
 from starlette.templating import Jinja2Templates
 
-from app.dependencies import get_settings, get_storage
-from app.services import masking
+from app.dependencies import get_preview_cache, get_settings, get_stage_executor, get_storage
+from app.services.executor import StageExecutor
 from app.services.file_storage import FileStorageService
+from app.services.preview import FragmentCache, PreviewPage, render_page
+from app.services.result_store import ResultSummary
+
+MAX_PAGES_PER_REQUEST = 10
+MAX_LOGS_PER_REQUEST = 500
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
@@ -17,22 +25,120 @@ async def preview(
     file_id: str,
     storage: FileStorageService = Depends(get_storage),
     settings=Depends(get_settings),
+    executor: StageExecutor = Depends(get_stage_executor),
 ):
-    result = storage.load_result(file_id)
-    if not result:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Файл не найден")
-
-    highlighted = masking.highlight_text(result.full_text, result.entities)
+    summary = await _get_summary(storage, executor, file_id)
+    pages = await executor.run("load_preview", storage.results.load_preview_pages, file_id)
+    entity_counts = await executor.run("load_preview", storage.results.entity_counts, file_id)
+    log_count = await executor.run("load_preview", storage.results.count_gpt_logs, file_id)
 
     return templates.TemplateResponse(
         "preview.html",
         {
             "request": request,
             "file_id": file_id,
-            "original_filename": result.original_filename,
-            "entities": result.entities,
-            "highlighted_text": highlighted,
+            "original_filename": summary.original_filename,
+            "pages": pages,
+            "entity_counts": entity_counts,
+            "entity_count": summary.entity_count,
+            "degraded": summary.degraded,
+            "log_count": log_count,
             "mask_style": settings.mask_style,
-            "gpt_logs": result.gpt_logs,
         },
     )
+
+
+@router.get("/preview/{file_id}/pages")
+async def preview_pages(
+    request: Request,
+    response: Response,
+    file_id: str,
+    start: int = Query(1, ge=1),
+    count: int = Query(3, ge=1, le=MAX_PAGES_PER_REQUEST),
+    storage: FileStorageService = Depends(get_storage),
+    executor: StageExecutor = Depends(get_stage_executor),
+    cache: FragmentCache = Depends(get_preview_cache),
+):
+    summary = await _get_summary(storage, executor, file_id)
+    etag = _etag(summary, f"pages:{start}:{count}")
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    pages = await executor.run("load_preview", storage.results.load_preview_pages, file_id)
+    selected = pages[start - 1 : start - 1 + count]
+    rendered = await executor.run("highlight", _render_pages, storage, cache, summary, selected)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    return {
+        "file_id": file_id,
+        "total_pages": len(pages),
+        "pages": rendered,
+    }
+
+
+@router.get("/preview/{file_id}/logs")
+async def preview_logs(
+    request: Request,
+    response: Response,
+    file_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_LOGS_PER_REQUEST),
+    storage: FileStorageService = Depends(get_storage),
+    executor: StageExecutor = Depends(get_stage_executor),
+):
+    summary = await _get_summary(storage, executor, file_id)
+    etag = _etag(summary, f"logs:{offset}:{limit}")
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    total = await executor.run("load_logs", storage.results.count_gpt_logs, file_id)
+    logs = await executor.run("load_logs", storage.results.load_gpt_logs, file_id, limit, offset)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    return {"file_id": file_id, "total": total, "offset": offset, "logs": logs}
+
+
+async def _get_summary(storage: FileStorageService, executor: StageExecutor, file_id: str) -> ResultSummary:
+    summary = await executor.run("load_summary", storage.load_summary, file_id)
+    if not summary:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Файл не найден")
+    return summary
+
+
+def _render_pages(
+    storage: FileStorageService,
+    cache: FragmentCache,
+    summary: ResultSummary,
+    pages: List[PreviewPage],
+) -> List[dict]:
+    rendered = []
+    for page in pages:
+        entities = storage.results.load_entities(summary.file_id, page.start_offset, page.end_offset)
+        key = (summary.file_id, summary.created_at, page.page)
+        html = cache.get(key)
+        if html is None:
+            blocks = storage.results.load_blocks(summary.file_id, page.first_block, page.last_block)
+            html = render_page(blocks, entities)
+            cache.put(key, html)
+        rendered.append(
+            {
+                "page": page.page,
+                "label": page.label,
+                "start_offset": page.start_offset,
+                "end_offset": page.end_offset,
+                "html": html,
+                "entities": [
+                    {"type": entity.type, "text": entity.text, "start": entity.start, "end": entity.end}
+                    for entity in entities
+                    if page.start_offset <= entity.start < page.end_offset
+                ],
+            }
+        )
+    return rendered
+
+
+def _etag(summary: ResultSummary, suffix: str) -> str:
+    digest = hashlib.sha1(f"{summary.file_id}:{summary.created_at}:{suffix}".encode()).hexdigest()
+    return f'"{digest}"'
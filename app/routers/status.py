@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from app.dependencies import get_detection_cache, get_gpt_client, get_job_queue, get_reaper, get_stage_executor
+from app.services.detection_cache import DetectionCache
+from app.services.executor import StageExecutor
+from app.services.jobs import JobQueue
+from app.services.metrics import REGISTRY, gauge_family
+from app.services.reaper import TempReaper
+from app.services.yandex_gpt import YandexGPTClient
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/status")
+async def service_status(
+    executor: StageExecutor = Depends(get_stage_executor),
+    job_queue: JobQueue = Depends(get_job_queue),
+    reaper: TempReaper = Depends(get_reaper),
+    gpt_client: YandexGPTClient = Depends(get_gpt_client),
+):
+    return {
+        "job_queue_depth": job_queue.queue_depth(),
+        "stages": executor.stats(),
+        "reaper": reaper.stats(),
+        "gpt_breaker": {"state": gpt_client.breaker.state, **gpt_client.breaker.stats()},
+    }
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics(
+    executor: StageExecutor = Depends(get_stage_executor),
+    job_queue: JobQueue = Depends(get_job_queue),
+    reaper: TempReaper = Depends(get_reaper),
+    cache: DetectionCache = Depends(get_detection_cache),
+    gpt_client: YandexGPTClient = Depends(get_gpt_client),
+):
+    stages = executor.stats()
+    families = [
+        gauge_family("masking_job_queue_depth", "Jobs waiting for a worker.", {"": job_queue.queue_depth()}),
+        gauge_family(
+            "masking_stage_queued",
+            "Stage calls waiting for an executor thread.",
+            {stage: counts["queued"] for stage, counts in stages.items()},
+            label="stage",
+        ),
+        gauge_family(
+            "masking_detection_cache",
+            "Detection cache counters and sizes.",
+            cache.stats(),
+            label="kind",
+        ),
+        gauge_family("masking_reaper", "Temp reaper counters and backlog.", reaper.stats(), label="kind"),
+        gauge_family(
+            "masking_gpt_circuit_breaker",
+            "GPT circuit breaker state and counters.",
+            gpt_client.breaker.stats(),
+            label="kind",
+        ),
+    ]
+    return PlainTextResponse(REGISTRY.render(families), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,22 +1,20 @@
 import logging
-from pathlib import Path
 
 from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile
-from fastapi.concurrency import run_in_threadpool
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
 from starlette import status
 from starlette.templating import Jinja2Templates
 
-from app.dependencies import get_gpt_client, get_settings, get_storage
-from app.models.entity_model import MaskingOptions
-from app.models.processing_result import ProcessingResult
-from app.services import document_parser, masking
-from app.services.exporter import export_masked
-from app.services.file_storage import FileStorageService
-from app.services.yandex_gpt import YandexGPTClient
+from app.dependencies import get_job_queue, get_settings, get_stage_executor, get_storage
+from app.services import document_parser
+from app.services.executor import StageExecutor
+from app.services.file_storage import FileStorageService, UploadTooLarge
+from app.services.jobs import Job, JobQueue
 
 logger = logging.getLogger(__name__)
 
+UPLOAD_TOO_LARGE_DETAIL = "Файл превышает максимальный размер загрузки."
+
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
 
@@ -38,54 +36,50 @@ async def upload_file(
     upload: UploadFile = File(...),
     settings=Depends(get_settings),
     storage: FileStorageService = Depends(get_storage),
-    gpt_client: YandexGPTClient = Depends(get_gpt_client),
+    job_queue: JobQueue = Depends(get_job_queue),
+    executor: StageExecutor = Depends(get_stage_executor),
 ):
-    _validate_upload(upload, settings.max_upload_size_bytes)
-
-    file_id, saved_path = storage.save_upload(upload)
-    logger.info("Uploaded file saved to %s", saved_path)
+    _validate_upload(upload)
 
-    document = await run_in_threadpool(
-        document_parser.parse_document, saved_path, upload.content_type, settings.ocr_lang
+    try:
+        stored = await executor.run(
+            "save_upload", storage.save_upload, upload, max_size_bytes=settings.max_upload_size_bytes
+        )
+    except UploadTooLarge:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=UPLOAD_TOO_LARGE_DETAIL,
+        )
+    logger.info("Uploaded file saved to %s (%s bytes, sha256 %s)", stored.path, stored.size, stored.sha256)
+
+    job = job_queue.submit(
+        Job(
+            job_id=stored.file_id,
+            file_id=stored.file_id,
+            original_filename=upload.filename or "document",
+            uploaded_path=stored.path,
+            content_type=upload.content_type,
+            content_hash=stored.sha256,
+        )
     )
+    await executor.run("track_files", storage.track_files, job.file_id, [job_queue.job_path(job.job_id)])
 
-    entities, gpt_logs = await gpt_client.detect_sensitive_data(document.full_text)
-    options = MaskingOptions(style=settings.mask_style)
-    masked = masking.mask_text(document.full_text, entities, options)
-    masked_path = export_masked(masked, original_path=saved_path, target_dir=settings.temp_dir)
-
-    result = ProcessingResult(
-        file_id=file_id,
-        original_filename=upload.filename or "document",
-        uploaded_path=saved_path,
-        masked_path=masked_path,
-        full_text=document.full_text,
-        masked_text=masked,
-        entities=entities,
-        gpt_logs=gpt_logs,
-    )
-    storage.save_result(result)
+    if "application/json" in request.headers.get("accept", ""):
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={"job_id": job.job_id, "status_url": f"/jobs/{job.job_id}"},
+        )
 
     return RedirectResponse(
-        url=f"/preview/{file_id}",
+        url=f"/jobs/{job.job_id}/view",
         status_code=status.HTTP_303_SEE_OTHER,
     )
 
 
-def _validate_upload(upload: UploadFile, max_size_bytes: int) -> None:
+def _validate_upload(upload: UploadFile) -> None:
     filename = upload.filename or ""
     if not document_parser.is_supported(filename):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Неподдерживаемый формат файла. Разрешены: docx, pdf, jpg, png, tiff.",
         )
-
-    upload.file.seek(0, 2)
-    size = upload.file.tell()
-    upload.file.seek(0)
-
-    if size > max_size_bytes:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail="Файл превышает максимальный размер загрузки.",
-        )
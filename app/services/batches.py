@@ -0,0 +1,239 @@
+import json
+import logging
+import mimetypes
+import os
+import re
+import tempfile
+import time
+import zipfile
+from dataclasses import asdict, dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from fastapi import UploadFile
+
+from app.services import document_parser
+from app.services.file_storage import FileStorageService, StoredUpload, UploadTooLarge
+from app.services.jobs import STATUS_DONE, STATUS_FAILED, Job
+
+logger = logging.getLogger(__name__)
+
+BATCH_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+MANIFEST_NAME = "manifest.json"
+ZIP_UTF8_FLAG = 0x800
+UNSUPPORTED_REASON = "Неподдерживаемый формат файла"
+TOO_LARGE_REASON = "Файл превышает максимальный размер загрузки"
+TOO_MANY_REASON = "Превышено количество файлов в пакете"
+UNPACKED_TOO_LARGE_REASON = "Превышен суммарный размер распакованных файлов пакета"
+ZIP_RATIO_REASON = "Слишком высокая степень сжатия файла в архиве"
+
+
+@dataclass
+class BatchItem:
+    job_id: str
+    filename: str
+
+
+@dataclass
+class Batch:
+    batch_id: str
+    items: List[BatchItem] = field(default_factory=list)
+    rejected: List[Dict[str, str]] = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+
+
+@dataclass
+class IngestedFile:
+    filename: str
+    content_type: Optional[str]
+    stored: StoredUpload
+
+
+class BatchStore:
+    def __init__(self, batches_dir: Path):
+        self.batches_dir = batches_dir
+        self.batches_dir.mkdir(parents=True, exist_ok=True)
+
+    def new_id(self) -> str:
+        return uuid4().hex
+
+    def save(self, batch: Batch) -> Path:
+        path = self.batch_path(batch.batch_id)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(asdict(batch), ensure_ascii=False), encoding="utf-8")
+        tmp_path.replace(path)
+        return path
+
+    def get(self, batch_id: str) -> Optional[Batch]:
+        if not BATCH_ID_RE.match(batch_id):
+            return None
+        path = self.batch_path(batch_id)
+        if not path.exists():
+            return None
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            data["items"] = [BatchItem(**item) for item in data["items"]]
+            return Batch(**data)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Batch file %s is unreadable: %s", path, exc)
+            return None
+
+    def batch_path(self, batch_id: str) -> Path:
+        return self.batches_dir / f"{batch_id}.json"
+
+    def archive_path(self, batch_id: str) -> Path:
+        return self.batches_dir / f"{batch_id}.zip"
+
+
+def ingest_uploads(
+    uploads: List[UploadFile],
+    storage: FileStorageService,
+    max_file_bytes: int,
+    max_files: int,
+    max_unpacked_bytes: int,
+    max_zip_ratio: int,
+) -> Tuple[List[IngestedFile], List[Dict[str, str]]]:
+    accepted: List[IngestedFile] = []
+    rejected: List[Dict[str, str]] = []
+    unpacked = 0
+
+    def accept(filename: str, content_type: Optional[str], save: Callable[[], StoredUpload]) -> None:
+        if not document_parser.is_supported(filename):
+            rejected.append({"filename": filename, "reason": UNSUPPORTED_REASON})
+        elif len(accepted) >= max_files:
+            rejected.append({"filename": filename, "reason": TOO_MANY_REASON})
+        else:
+            try:
+                accepted.append(IngestedFile(filename=filename, content_type=content_type, stored=save()))
+            except UploadTooLarge:
+                rejected.append({"filename": filename, "reason": TOO_LARGE_REASON})
+
+    for upload in uploads:
+        filename = upload.filename or "upload"
+        if filename.lower().endswith(".zip"):
+            unpacked += _ingest_zip(
+                upload, storage, max_file_bytes, max_unpacked_bytes - unpacked, max_zip_ratio, accept, rejected
+            )
+            continue
+        accept(filename, upload.content_type, lambda: storage.save_upload(upload, max_size_bytes=max_file_bytes))
+
+    return accepted, rejected
+
+
+def _ingest_zip(
+    upload: UploadFile,
+    storage: FileStorageService,
+    max_file_bytes: int,
+    max_unpacked_bytes: int,
+    max_ratio: int,
+    accept: Callable[[str, Optional[str], Callable[[], StoredUpload]], None],
+    rejected: List[Dict[str, str]],
+) -> int:
+    upload.file.seek(0)
+    try:
+        archive = zipfile.ZipFile(upload.file)
+    except zipfile.BadZipFile:
+        rejected.append({"filename": upload.filename or "archive.zip", "reason": "Повреждённый ZIP-архив"})
+        return 0
+
+    unpacked = 0
+    with archive:
+        for member in archive.infolist():
+            name = _member_name(member)
+            if member.is_dir() or _is_unsafe_member(name):
+                continue
+            if member.file_size > max_file_bytes:
+                rejected.append({"filename": name, "reason": TOO_LARGE_REASON})
+                continue
+            if member.file_size > max_ratio * max(member.compress_size, 1):
+                rejected.append({"filename": name, "reason": ZIP_RATIO_REASON})
+                continue
+            if unpacked + member.file_size > max_unpacked_bytes:
+                rejected.append({"filename": name, "reason": UNPACKED_TOO_LARGE_REASON})
+                continue
+
+            def save(member=member) -> StoredUpload:
+                nonlocal unpacked
+                # Header sizes can lie, so the stream itself is capped by what is left of the budget.
+                limit = min(max_file_bytes, max_unpacked_bytes - unpacked)
+                with archive.open(member) as stream:
+                    stored = storage.save_stream(stream, _member_name(member), max_size_bytes=limit)
+                unpacked += stored.size
+                return stored
+
+            accept(name, mimetypes.guess_type(name)[0], save)
+    return unpacked
+
+
+def _member_name(member: zipfile.ZipInfo) -> str:
+    if member.flag_bits & ZIP_UTF8_FLAG:
+        return member.filename
+    try:
+        return member.filename.encode("cp437").decode("cp866")
+    except UnicodeError:
+        return member.filename
+
+
+def _is_unsafe_member(name: str) -> bool:
+    path = PurePosixPath(name.replace("\\", "/"))
+    return path.is_absolute() or ".." in path.parts or path.name.startswith(".") or "__MACOSX" in path.parts
+
+
+def build_archive(
+    batch: Batch,
+    jobs: Dict[str, Job],
+    storage: FileStorageService,
+    destination: Path,
+) -> Path:
+    with tempfile.NamedTemporaryFile(dir=destination.parent, suffix=".tmp", delete=False) as tmp_file:
+        tmp_path = Path(tmp_file.name)
+
+    try:
+        _write_archive(tmp_path, batch, jobs, storage)
+        os.replace(tmp_path, destination)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return destination
+
+
+def _write_archive(
+    path: Path,
+    batch: Batch,
+    jobs: Dict[str, Job],
+    storage: FileStorageService,
+) -> None:
+    manifest: Dict[str, Any] = {"batch_id": batch.batch_id, "files": [], "rejected": batch.rejected}
+    used_names = set()
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for item in batch.items:
+            job = jobs.get(item.job_id)
+            entry = {
+                "filename": item.filename,
+                "job_id": item.job_id,
+                "status": job.status if job else STATUS_FAILED,
+                "error": job.error if job else "Задача не найдена",
+                "masked_file": None,
+                "degraded": False,
+                "entity_counts": {},
+            }
+            summary = storage.load_summary(job.file_id) if job and job.status == STATUS_DONE else None
+            if summary is not None and summary.masked_path.exists():
+                arcname = _masked_name(item.filename, summary.masked_path.suffix, item.job_id, used_names)
+                archive.write(summary.masked_path, arcname)
+                entry["masked_file"] = arcname
+                entry["degraded"] = summary.degraded
+                entry["entity_counts"] = storage.results.entity_counts(job.file_id)
+            manifest["files"].append(entry)
+
+        archive.writestr(MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=2))
+
+
+def _masked_name(filename: str, suffix: str, job_id: str, used_names: set) -> str:
+    path = PurePosixPath(filename.replace("\\", "/"))
+    name = str(path.with_name(f"{path.stem}_masked{suffix}"))
+    if name in used_names:
+        name = str(path.with_name(f"{path.stem}_{job_id[:8]}_masked{suffix}"))
+    used_names.add(name)
+    return name
@@ -0,0 +1,109 @@
+import asyncio
+from bisect import bisect_right
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from app.models.entity_model import SensitiveEntity
+from app.services.reconcile import reconcile_entities
+
+PACK_SEPARATOR = "\n\n---\n\n"
+
+DetectionResult = Tuple[Optional[List[SensitiveEntity]], List[Dict[str, Any]]]
+Dispatch = Callable[..., Awaitable[DetectionResult]]
+
+
+class ChunkPacker:
+    def __init__(self, dispatch: Dispatch, max_chars: int, window_seconds: float = 0.05):
+        self.dispatch = dispatch
+        self.max_chars = max_chars
+        self.window_seconds = max(0.0, window_seconds)
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._pending_chars = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, text: str) -> DetectionResult:
+        loop = asyncio.get_running_loop()
+        if self._pending and self._pending_chars + len(PACK_SEPARATOR) + len(text) > self.max_chars:
+            self._dispatch_pending()
+
+        future = loop.create_future()
+        self._pending.append((text, future))
+        self._pending_chars += len(text) + (len(PACK_SEPARATOR) if len(self._pending) > 1 else 0)
+        if self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._dispatch_pending)
+        return await future
+
+    async def flush(self) -> None:
+        self._dispatch_pending()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _dispatch_pending(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._pending_chars = self._pending, [], 0
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        try:
+            if len(batch) == 1:
+                text, future = batch[0]
+                result = await self.dispatch(text)
+                if not future.done():
+                    future.set_result(result)
+                return
+
+            # Entities come back unreconciled and are re-anchored per member, so a match can
+            # never snap onto the same text inside a neighbouring document.
+            combined = PACK_SEPARATOR.join(text for text, _ in batch)
+            entities, logs = await self.dispatch(combined, reconcile=False)
+            for log in logs:
+                log["packed"] = len(batch)
+
+            offsets = []
+            start = 0
+            for text, _ in batch:
+                offsets.append(start)
+                start += len(text) + len(PACK_SEPARATOR)
+            claimed: List[List[SensitiveEntity]] = [[] for _ in batch]
+            for entity in entities or []:
+                index = max(0, bisect_right(offsets, entity.start) - 1)
+                offset = offsets[index]
+                claimed[index].append(
+                    SensitiveEntity(
+                        type=entity.type, text=entity.text, start=entity.start - offset, end=entity.end - offset
+                    )
+                )
+
+            for (text, future), offset, member_claimed in zip(batch, offsets, claimed):
+                member = None
+                member_logs = _member_logs(logs, offset, len(text))
+                if entities is not None:
+                    member, unlocated = reconcile_entities(text, member_claimed)
+                    if unlocated:
+                        member_logs.append(
+                            {"direction": "degraded", "reason": "unlocated_entities", "entities": unlocated}
+                        )
+                if not future.done():
+                    future.set_result((member, member_logs))
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as exc:  # noqa: BLE001
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+
+
+def _member_logs(logs: List[Dict[str, Any]], offset: int, length: int) -> List[Dict[str, Any]]:
+    # Request and response bodies carry the text and entities of every packed
+    # document, so members only get the metadata of the shared request.
+    return [
+        {**{key: value for key, value in log.items() if key != "body"}, "pack_offset": offset, "pack_length": length}
+        for log in logs
+    ]
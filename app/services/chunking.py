@@ -0,0 +1,102 @@
+import re
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from app.models.document_model import DocumentModel
+from app.models.entity_model import SensitiveEntity, sort_entities
+
+SENTENCE_END_RE = re.compile(r"[.!?…;:]+[\"»)\]]*\s+|\n+")
+WHITESPACE_RE = re.compile(r"\s+")
+MIN_FILL_RATIO = 0.5
+
+
+@dataclass
+class Chunk:
+    text: str
+    offset: int
+
+    @property
+    def end(self) -> int:
+        return self.offset + len(self.text)
+
+
+def block_boundaries(document: DocumentModel) -> List[int]:
+    return [block.start_offset + len(block.text) for block in document.blocks if block.text]
+
+
+def chunk_limit(chunk_size: int, token_budget: int = 0, chars_per_token: float = 3.0) -> int:
+    limit = max(1, chunk_size)
+    if token_budget > 0:
+        limit = min(limit, max(1, int(token_budget * chars_per_token)))
+    return limit
+
+
+def split_text(
+    text: str,
+    max_chars: int,
+    overlap: int = 0,
+    boundaries: Optional[Sequence[int]] = None,
+) -> List[Chunk]:
+    length = len(text)
+    if length <= max_chars:
+        return [Chunk(text=text, offset=0)] if text else []
+
+    paragraphs = sorted({offset for offset in boundaries or () if 0 < offset < length})
+    sentences = [match.end() for match in SENTENCE_END_RE.finditer(text)]
+    spaces = [match.end() for match in WHITESPACE_RE.finditer(text)]
+    overlap = max(0, min(overlap, max_chars // 2))
+
+    chunks: List[Chunk] = []
+    start = 0
+    while start < length:
+        limit = start + max_chars
+        if limit >= length:
+            chunks.append(Chunk(text=text[start:], offset=start))
+            break
+
+        floor = start + int(max_chars * MIN_FILL_RATIO)
+        end = (
+            _last_between(paragraphs, floor, limit)
+            or _last_between(sentences, floor, limit)
+            or _last_between(spaces, start + 1, limit)
+            or limit
+        )
+        chunks.append(Chunk(text=text[start:end], offset=start))
+
+        next_start = end
+        if overlap:
+            next_start = _first_between(sentences, end - overlap, end) or _first_between(spaces, end - overlap, end)
+            next_start = next_start or end
+        start = max(next_start, start + 1)
+    return chunks
+
+
+def merge_entities(text: str, entities: List[SensitiveEntity]) -> List[SensitiveEntity]:
+    merged: List[SensitiveEntity] = []
+    open_by_type = {}
+    for entity in sort_entities(entities):
+        current = open_by_type.get(entity.type)
+        if current is not None and entity.start <= current.end:
+            if entity.end > current.end:
+                current.end = entity.end
+                current.text = text[current.start : current.end] or current.text + entity.text
+            continue
+        entity = SensitiveEntity(type=entity.type, text=entity.text, start=entity.start, end=entity.end)
+        open_by_type[entity.type] = entity
+        merged.append(entity)
+    return merged
+
+
+def _last_between(offsets: Sequence[int], low: int, high: int) -> Optional[int]:
+    index = bisect_right(offsets, high) - 1
+    if index >= 0 and offsets[index] >= low:
+        return offsets[index]
+    return None
+
+
+def _first_between(offsets: Sequence[int], low: int, high: int) -> Optional[int]:
+    index = bisect_left(offsets, low)
+    if index < len(offsets) and offsets[index] < high:
+        return offsets[index]
+    return None
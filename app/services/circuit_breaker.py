@@ -0,0 +1,117 @@
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        window: int = 20,
+        min_calls: int = 5,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 20.0,
+        slow_call_rate: float = 0.5,
+        open_seconds: float = 30.0,
+        half_open_calls: int = 1,
+    ):
+        self.min_calls = max(1, min_calls)
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_calls = max(1, half_open_calls)
+        self.state = STATE_CLOSED
+        self.trips = 0
+        self.rejected = 0
+        self._calls: Deque[Tuple[bool, bool]] = deque(maxlen=max(self.min_calls, window))
+        self._opened_at = 0.0
+        self._trials = 0
+        self._trial_successes = 0
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == STATE_OPEN and time.monotonic() - self._opened_at < self.open_seconds
+
+    def admit(self) -> bool:
+        # Cheap gate before any work is queued; half-open trial slots are only taken by allow().
+        if self.is_open:
+            self.rejected += 1
+            return False
+        return True
+
+    def allow(self) -> bool:
+        if self.state == STATE_OPEN:
+            if self.is_open:
+                self.rejected += 1
+                return False
+            self._transition(STATE_HALF_OPEN)
+        if self.state == STATE_HALF_OPEN:
+            if self._trials >= self.half_open_calls:
+                self.rejected += 1
+                return False
+            self._trials += 1
+        return True
+
+    def record(self, success: bool, seconds: float) -> None:
+        slow = self.slow_call_seconds > 0 and seconds >= self.slow_call_seconds
+        if self.state == STATE_HALF_OPEN:
+            self._trials = max(0, self._trials - 1)
+            if not success or slow:
+                self._trip("trial call failed" if not success else f"trial call took {seconds:.1f}s")
+                return
+            self._trial_successes += 1
+            if self._trial_successes >= self.half_open_calls:
+                self._transition(STATE_CLOSED)
+            return
+        if self.state == STATE_OPEN:
+            return
+
+        self._calls.append((success, slow))
+        if len(self._calls) < self.min_calls:
+            return
+        failures = sum(1 for ok, _ in self._calls if not ok) / len(self._calls)
+        slow_calls = sum(1 for _, is_slow in self._calls if is_slow) / len(self._calls)
+        if failures >= self.failure_rate:
+            self._trip(f"failure rate {failures:.0%}")
+        elif self.slow_call_seconds > 0 and slow_calls >= self.slow_call_rate:
+            self._trip(f"slow call rate {slow_calls:.0%}")
+
+    def release(self) -> None:
+        if self.state == STATE_HALF_OPEN:
+            self._trials = max(0, self._trials - 1)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "open": int(self.state == STATE_OPEN),
+            "half_open": int(self.state == STATE_HALF_OPEN),
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "window_calls": len(self._calls),
+            "window_failures": sum(1 for ok, _ in self._calls if not ok),
+        }
+
+    def _trip(self, reason: str) -> None:
+        self.trips += 1
+        self._opened_at = time.monotonic()
+        logger.warning("GPT circuit breaker opened for %.0fs: %s", self.open_seconds, reason)
+        self._transition(STATE_OPEN)
+
+    def _transition(self, state: str) -> None:
+        if state != STATE_OPEN and self.state != state:
+            logger.info("GPT circuit breaker %s", state.replace("_", "-"))
+        self.state = state
+        self._trials = 0
+        self._trial_successes = 0
+        if state == STATE_CLOSED:
+            self._calls.clear()
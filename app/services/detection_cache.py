@@ -0,0 +1,170 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.models.entity_model import SensitiveEntity
+
+logger = logging.getLogger(__name__)
+
+CachedItems = List[Tuple[str, str, int, int]]
+
+
+class DetectionCache:
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        disk_dir: Optional[Path] = None,
+        disk_max_bytes: int = 0,
+        ttl_seconds: int = 0,
+    ):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, Tuple[float, CachedItems]]" = OrderedDict()
+        self._disk_bytes = 0
+        self._disk_lock = threading.RLock()
+
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(path.stat().st_size for path in self.disk_dir.glob("*.json"))
+
+    @staticmethod
+    def make_key(chunk: str, model_uri: str, prompt_version: str) -> str:
+        digest = hashlib.sha256()
+        for part in (prompt_version, model_uri, chunk):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    async def get(self, key: str) -> Optional[List[SensitiveEntity]]:
+        items = self._get_memory(key)
+        if items is None and self.disk_dir is not None:
+            items = await asyncio.to_thread(self._get_disk, key)
+            if items is not None:
+                self.disk_hits += 1
+                self._put_memory(key, items, time.time())
+
+        if items is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return [SensitiveEntity(type=t, text=text, start=start, end=end) for t, text, start, end in items]
+
+    async def put(self, key: str, entities: List[SensitiveEntity]) -> None:
+        items = [(entity.type, entity.text, entity.start, entity.end) for entity in entities]
+        now = time.time()
+        self._put_memory(key, items, now)
+        if self.disk_dir is not None and self.disk_max_bytes > 0:
+            await asyncio.to_thread(self._put_disk, key, items)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_entries": len(self._memory),
+            "disk_bytes": self._disk_bytes,
+        }
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - stored_at > self.ttl_seconds
+
+    def _get_memory(self, key: str) -> Optional[CachedItems]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+
+        stored_at, items = entry
+        if self._expired(stored_at):
+            del self._memory[key]
+            return None
+
+        self._memory.move_to_end(key)
+        return items
+
+    def _put_memory(self, key: str, items: CachedItems, stored_at: float) -> None:
+        if self.max_entries <= 0:
+            return
+
+        self._memory[key] = (stored_at, items)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / f"{key}.json"
+
+    def _get_disk(self, key: str) -> Optional[CachedItems]:
+        path = self._disk_path(key)
+        try:
+            if self._expired(path.stat().st_mtime):
+                self._remove_disk(path)
+                return None
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Detection cache entry %s is unreadable: %s", path, exc)
+            self._remove_disk(path)
+            return None
+
+        return [tuple(item) for item in data]
+
+    def _put_disk(self, key: str, items: CachedItems) -> None:
+        path = self._disk_path(key)
+        temp_path = path.with_name(f"{path.name}.tmp")
+        payload = json.dumps(items, ensure_ascii=False).encode("utf-8")
+        with self._disk_lock:
+            try:
+                previous = path.stat().st_size if path.exists() else 0
+                temp_path.write_bytes(payload)
+                temp_path.replace(path)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Detection cache write failed for %s: %s", path, exc)
+                temp_path.unlink(missing_ok=True)
+                return
+
+            self._disk_bytes += len(payload) - previous
+            if self._disk_bytes > self.disk_max_bytes:
+                self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        target = self.disk_max_bytes * 0.9
+        entries = []
+        for path in self.disk_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        self._disk_bytes = sum(size for _, size, _ in entries)
+        now = time.time()
+        for mtime, size, path in entries:
+            expired = self.ttl_seconds > 0 and now - mtime > self.ttl_seconds
+            if not expired and self._disk_bytes <= target:
+                break
+            self._remove_disk(path, size)
+
+    def _remove_disk(self, path: Path, size: Optional[int] = None) -> None:
+        try:
+            if size is None:
+                size = path.stat().st_size
+            path.unlink(missing_ok=True)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Detection cache eviction skipped for %s: %s", path, exc)
+            return
+        with self._disk_lock:
+            self._disk_bytes = max(0, self._disk_bytes - size)
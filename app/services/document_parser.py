@@ -3,7 +3,7 @@ from typing import Iterable
 
 from PIL import Image
 
-from app.models.document_model import DocumentModel
+from app.models.document_model import DocumentModel, OcrOptions
 from app.services.parser_docx import parse_docx
 from app.services.parser_pdf import parse_pdf
 from app.services.parser_ocr import parse_images
@@ -20,17 +20,22 @@ def is_supported(filename: str) -> bool:
     return Path(filename).suffix.lower() in SUPPORTED_EXTENSIONS
 
 
-def parse_document(path: Path, mime_type: str | None = None, ocr_lang: str = "rus+eng") -> DocumentModel:
+def parse_document(
+    path: Path,
+    mime_type: str | None = None,
+    ocr_options: OcrOptions | None = None,
+) -> DocumentModel:
+    ocr_options = ocr_options or OcrOptions()
     suffix = path.suffix.lower()
 
     if suffix == ".docx":
         return parse_docx(path)
 
     if suffix == ".pdf":
-        return parse_pdf(path, ocr_lang=ocr_lang)
+        return parse_pdf(path, ocr_options=ocr_options)
 
     if suffix in IMAGE_EXTENSIONS:
-        return _parse_image(path, ocr_lang)
+        return _parse_image(path, ocr_options.lang)
 
     raise UnsupportedFile(f"Unsupported file type: {suffix}")
 
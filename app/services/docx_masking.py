@@ -0,0 +1,92 @@
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from docx import Document
+from docx.oxml.ns import qn
+from docx.text.run import Run
+
+from app.models.entity_model import MaskingOptions, SensitiveEntity
+from app.models.entity_set import EntitySet
+from app.services.parser_docx import iter_paragraphs, paragraph_runs
+
+# The children python-docx concatenates into Run.text; offsets are counted over these.
+RUN_TEXT_XPATH = "w:br | w:cr | w:noBreakHyphen | w:ptab | w:t | w:tab"
+
+
+class RunIndex:
+    def __init__(self, doc):
+        self.starts: List[int] = []
+        self.runs: List[Run] = []
+        self.texts: List[str] = []
+        offset = 0
+
+        for para in iter_paragraphs(doc):
+            for run in paragraph_runs(para):
+                text = run.text
+                if text:
+                    self.starts.append(offset)
+                    self.runs.append(run)
+                    self.texts.append(text)
+                    offset += len(text)
+            offset += 1
+
+    def first_run(self, offset: int) -> int:
+        return max(0, bisect_right(self.starts, offset) - 1)
+
+
+def mask_docx(
+    source: Path,
+    destination: Path,
+    entities: Iterable[SensitiveEntity],
+    options: MaskingOptions,
+) -> None:
+    doc = Document(source)
+    index = RunIndex(doc)
+    edits: Dict[int, List[Tuple[int, int, str]]] = {}
+
+    for start, end, entity_type in EntitySet.from_entities(entities).spans().iter_spans():
+        replacement = options.render(entity_type, end - start)
+
+        position = index.first_run(start)
+        while position < len(index.runs) and index.starts[position] < end:
+            run_start = index.starts[position]
+            local_start = max(start - run_start, 0)
+            local_end = min(end - run_start, len(index.texts[position]))
+            if local_start < local_end:
+                edits.setdefault(position, []).append((local_start, local_end, replacement))
+                replacement = ""
+            position += 1
+
+    for position, run_edits in edits.items():
+        _rewrite_run(index.runs[position], run_edits)
+
+    doc.save(destination)
+
+
+def _rewrite_run(run: Run, run_edits: List[Tuple[int, int, str]]) -> None:
+    # Only w:t text is rewritten so drawings, field codes and tabs in the run survive.
+    placed = set()
+    offset = 0
+    for element in run._r.xpath(RUN_TEXT_XPATH):
+        piece_start = offset
+        offset += len(str(element))
+        if element.tag != qn("w:t"):
+            continue
+
+        text = element.text or ""
+        parts: List[str] = []
+        cursor = piece_start
+        for number, (local_start, local_end, replacement) in enumerate(run_edits):
+            if local_end <= piece_start or local_start >= offset:
+                continue
+            parts.append(text[cursor - piece_start : max(local_start, piece_start) - piece_start])
+            if number not in placed:
+                parts.append(replacement)
+                placed.add(number)
+            cursor = min(local_end, offset)
+        if not parts:
+            continue
+        parts.append(text[cursor - piece_start :])
+        element.text = "".join(parts)
+        element.set(qn("xml:space"), "preserve")
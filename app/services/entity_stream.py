@@ -0,0 +1,110 @@
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+from app.models.entity_model import SensitiveEntity
+
+logger = logging.getLogger(__name__)
+
+TYPE_CODES = {"P": "PERSON", "C": "COMPANY", "J": "PROJECT", "R": "REKVIZIT"}
+
+
+class EntityStreamParser:
+    def __init__(self):
+        self._text = ""
+        self._received = ""
+        self._stack: List[str] = []
+        self._object_start: Optional[int] = None
+        self._object_depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed_snapshot(self, text: str) -> List[SensitiveEntity]:
+        if text.startswith(self._received):
+            delta = text[len(self._received) :]
+        else:
+            delta = text
+        self._received = text
+        return self.feed(delta)
+
+    def feed(self, delta: str) -> List[SensitiveEntity]:
+        entities: List[SensitiveEntity] = []
+        base = len(self._text)
+        self._text += delta
+
+        for index, char in enumerate(delta):
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if char == "{" and self._stack and self._stack[-1] == "[" and self._object_start is None:
+                    self._object_start = base + index
+                    self._object_depth = len(self._stack)
+                self._stack.append(char)
+            elif char in "}]" and self._stack:
+                self._stack.pop()
+                if char == "}" and self._object_start is not None and len(self._stack) == self._object_depth:
+                    entity = self._parse_object(self._text[self._object_start : base + index + 1])
+                    self._object_start = None
+                    if entity is not None:
+                        entities.append(entity)
+        return entities
+
+    def finish(self) -> List[SensitiveEntity]:
+        return []
+
+    def _parse_object(self, payload: str) -> Optional[SensitiveEntity]:
+        try:
+            item: Dict[str, Any] = json.loads(payload)
+            return SensitiveEntity(
+                type=item.get("type", "UNKNOWN"),
+                text=item.get("text", ""),
+                start=int(item.get("start", 0)),
+                end=int(item.get("end", 0)),
+            )
+        except Exception as exc:  # noqa: BLE001
+            logger.debug("Skipping malformed streamed entity: %s", exc)
+            return None
+
+
+class CompactEntityParser:
+    def __init__(self):
+        self._received = ""
+        self._pending = ""
+
+    def feed_snapshot(self, text: str) -> List[SensitiveEntity]:
+        if text.startswith(self._received):
+            delta = text[len(self._received) :]
+        else:
+            delta = text
+        self._received = text
+        return self.feed(delta)
+
+    def feed(self, delta: str) -> List[SensitiveEntity]:
+        lines = (self._pending + delta).split("\n")
+        self._pending = lines.pop()
+        return [entity for entity in map(parse_compact_line, lines) if entity is not None]
+
+    def finish(self) -> List[SensitiveEntity]:
+        line, self._pending = self._pending, ""
+        entity = parse_compact_line(line)
+        return [entity] if entity is not None else []
+
+
+def parse_compact_line(line: str) -> Optional[SensitiveEntity]:
+    parts = line.strip().strip("`").split("|", 2)
+    if len(parts) != 3:
+        return None
+    code, start, text = (part.strip() for part in parts)
+    if not text or not start.isdigit():
+        return None
+    code = code.upper()
+    return SensitiveEntity(type=TYPE_CODES.get(code, code), text=text, start=int(start), end=int(start) + len(text))
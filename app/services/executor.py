@@ -0,0 +1,79 @@
+import asyncio
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from app.services.metrics import STAGE_IN_FLIGHT, STAGE_SECONDS
+
+T = TypeVar("T")
+
+
+class StageExecutor:
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = max(1, workers)
+        self.max_pending = max(self.workers, max_pending)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._queued: Dict[str, int] = defaultdict(int)
+        self._running: Dict[str, int] = defaultdict(int)
+        self._completed: Dict[str, int] = defaultdict(int)
+
+    async def run(self, stage: str, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        async with self._slots:
+            self._update(stage, queued=1)
+            # Whichever side claims the queued slot first (the worker thread, or this
+            # coroutine on cancellation/failure) is the one that decrements it.
+            queued = [True]
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(
+                    self._pool(), partial(self._call, stage, queued, func, *args, **kwargs)
+                )
+            finally:
+                self._dequeue(stage, queued)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            stages = set(self._queued) | set(self._running) | set(self._completed)
+            return {
+                stage: {
+                    "queued": self._queued[stage],
+                    "running": self._running[stage],
+                    "completed": self._completed[stage],
+                }
+                for stage in sorted(stages)
+            }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="stage")
+        return self._executor
+
+    def _call(self, stage: str, queued: List[bool], func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        self._dequeue(stage, queued)
+        self._update(stage, running=1)
+        try:
+            with STAGE_IN_FLIGHT.track_in_progress(stage=stage), STAGE_SECONDS.time(stage=stage):
+                return func(*args, **kwargs)
+        finally:
+            self._update(stage, running=-1, completed=1)
+
+    def _dequeue(self, stage: str, queued: List[bool]) -> None:
+        with self._lock:
+            if queued[0]:
+                queued[0] = False
+                self._queued[stage] -= 1
+
+    def _update(self, stage: str, queued: int = 0, running: int = 0, completed: int = 0) -> None:
+        with self._lock:
+            self._queued[stage] += queued
+            self._running[stage] += running
+            self._completed[stage] += completed
@@ -1,41 +1,123 @@
+import logging
+from functools import lru_cache
 from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
 
 from docx import Document
 from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfgen import canvas
 
+from app.models.document_model import DocumentModel, OcrOptions
+from app.models.entity_model import MaskingOptions
+from app.models.entity_set import EntitySet
+from app.services.docx_masking import mask_docx
+from app.services.pdf_redaction import RedactionIncomplete, redact_image, redact_pdf
 
-def export_masked(masked_text: str, original_path: Path, target_dir: Path) -> Path:
+logger = logging.getLogger(__name__)
+
+PDF_FONT_NAME = "MaskingSans"
+PDF_FONT_SIZE = 10
+PDF_LINE_HEIGHT = 14
+PDF_FONT_CANDIDATES = (
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans.ttf",
+    "/Library/Fonts/Arial Unicode.ttf",
+    "C:/Windows/Fonts/arial.ttf",
+)
+
+
+def export_masked(
+    masked_blocks: Iterable[str],
+    original_path: Path,
+    target_dir: Path,
+    entities: Optional[EntitySet] = None,
+    options: Optional[MaskingOptions] = None,
+    document: Optional[DocumentModel] = None,
+    ocr_options: Optional[OcrOptions] = None,
+    logs: Optional[List[Dict[str, Any]]] = None,
+) -> Path:
     target_dir.mkdir(parents=True, exist_ok=True)
     suffix = original_path.suffix.lower()
     name = f"{original_path.stem}_masked{suffix if suffix in {'.docx', '.pdf'} else '.pdf'}"
     destination = target_dir / name
 
     if suffix == ".docx":
-        _write_docx(masked_text, destination)
+        if entities is not None and _export_in_place(
+            mask_docx, original_path, destination, entities, options or MaskingOptions()
+        ):
+            return destination
+        _write_docx(masked_blocks, destination)
     else:
-        _write_pdf(masked_text, destination)
+        redact = redact_pdf if suffix == ".pdf" else redact_image
+        if entities is not None and document is not None and _export_in_place(
+            redact, original_path, destination, document, entities, ocr_options or OcrOptions(), logs=logs
+        ):
+            return destination
+        _write_pdf(masked_blocks, destination)
 
     return destination
 
 
-def _write_docx(masked_text: str, destination: Path) -> None:
+def _export_in_place(
+    export: Callable[..., None],
+    original_path: Path,
+    destination: Path,
+    *args,
+    logs: Optional[List[Dict[str, Any]]] = None,
+) -> bool:
+    try:
+        export(original_path, destination, *args)
+    except RedactionIncomplete as exc:
+        logger.warning("Redaction of %s is incomplete, falling back to plain export: %s", original_path, exc)
+        if logs is not None:
+            logs.append({"direction": "degraded", "reason": "redaction_incomplete", "error": str(exc)})
+        return False
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("In-place masking failed for %s, falling back to plain export: %s", original_path, exc)
+        return False
+    return True
+
+
+def _write_docx(masked_blocks: Iterable[str], destination: Path) -> None:
     doc = Document()
-    for line in masked_text.splitlines():
+    for line in _lines(masked_blocks):
         doc.add_paragraph(line)
     doc.save(destination)
 
 
-def _write_pdf(masked_text: str, destination: Path) -> None:
+def _write_pdf(masked_blocks: Iterable[str], destination: Path) -> None:
+    font_name = pdf_font()
     pdf = canvas.Canvas(str(destination), pagesize=A4)
+    pdf.setFont(font_name, PDF_FONT_SIZE)
     width, height = A4
     margin = 40
     max_width = width - 2 * margin
     y = height - margin
-    for line in masked_text.splitlines():
-        if y < margin:
-            pdf.showPage()
-            y = height - margin
-        pdf.drawString(margin, y, line[: int(max_width // 7)])
-        y -= 15
+    for line in _lines(masked_blocks):
+        for wrapped in simpleSplit(line, font_name, PDF_FONT_SIZE, max_width) or [""]:
+            if y < margin:
+                pdf.showPage()
+                pdf.setFont(font_name, PDF_FONT_SIZE)
+                y = height - margin
+            pdf.drawString(margin, y, wrapped)
+            y -= PDF_LINE_HEIGHT
     pdf.save()
+
+
+def _lines(masked_blocks: Iterable[str]) -> Iterator[str]:
+    for block in masked_blocks:
+        yield from block.splitlines()
+
+
+@lru_cache(maxsize=1)
+def pdf_font() -> str:
+    for candidate in PDF_FONT_CANDIDATES:
+        if Path(candidate).exists():
+            pdfmetrics.registerFont(TTFont(PDF_FONT_NAME, candidate))
+            return PDF_FONT_NAME
+
+    logger.warning("No Unicode TTF font found, Cyrillic text in PDF exports may not render")
+    return "Helvetica"
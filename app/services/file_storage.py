@@ -1,83 +1,125 @@
+import hashlib
 import json
 import logging
-import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Iterable, List, Optional
 from uuid import uuid4
 
 from fastapi import UploadFile
 
+from app.models.document_model import DocumentModel, TextBlock
 from app.models.entity_model import SensitiveEntity
+from app.models.entity_set import EntitySet
 from app.models.processing_result import ProcessingResult
+from app.services.metrics import UPLOAD_BYTES
+from app.services.reaper import ExpiryIndex
+from app.services.result_store import ResultStore, ResultSummary
 
 logger = logging.getLogger(__name__)
 
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+@dataclass
+class StoredUpload:
+    file_id: str
+    path: Path
+    size: int
+    sha256: str
+
 
 class FileStorageService:
-    def __init__(self, temp_dir: Path):
+    def __init__(self, temp_dir: Path, results_db_path: Optional[Path] = None, ttl_seconds: int = 60 * 60 * 24):
         self.temp_dir = temp_dir
         self.temp_dir.mkdir(parents=True, exist_ok=True)
+        db_path = results_db_path or temp_dir / "db" / "results.sqlite3"
+        self.results = ResultStore(db_path)
+        self.expiry = ExpiryIndex(db_path, ttl_seconds)
+        self._import_legacy_results()
+
+    def save_upload(self, upload: UploadFile, max_size_bytes: Optional[int] = None) -> StoredUpload:
+        upload.file.seek(0)
+        return self.save_stream(upload.file, upload.filename or "upload", max_size_bytes)
 
-    def save_upload(self, upload: UploadFile) -> tuple[str, Path]:
+    def save_stream(self, stream: BinaryIO, filename: str, max_size_bytes: Optional[int] = None) -> StoredUpload:
         file_id = uuid4().hex
-        safe_name = Path(upload.filename or "upload").name
+        safe_name = Path(filename.replace("\\", "/")).name or "upload"
         target = self.temp_dir / f"{file_id}_{safe_name}"
+        digest = hashlib.sha256()
+        size = 0
 
-        with target.open("wb") as buffer:
-            upload.file.seek(0)
-            buffer.write(upload.file.read())
+        try:
+            with target.open("wb") as buffer:
+                while chunk := stream.read(COPY_CHUNK_SIZE):
+                    size += len(chunk)
+                    if max_size_bytes is not None and size > max_size_bytes:
+                        raise UploadTooLarge(f"Upload exceeds {max_size_bytes} bytes")
+                    digest.update(chunk)
+                    buffer.write(chunk)
+        except BaseException:
+            target.unlink(missing_ok=True)
+            raise
 
-        return file_id, target
+        UPLOAD_BYTES.inc(size)
+        self.expiry.track(file_id, [target])
+        return StoredUpload(file_id=file_id, path=target, size=size, sha256=digest.hexdigest())
 
     def save_result(self, result: ProcessingResult) -> None:
-        meta_path = self._metadata_path(result.file_id)
-        payload = {
-            "file_id": result.file_id,
-            "original_filename": result.original_filename,
-            "uploaded_path": str(result.uploaded_path),
-            "masked_path": str(result.masked_path),
-            "full_text": result.full_text,
-            "masked_text": result.masked_text,
-            "entities": [vars(entity) for entity in result.entities],
-            "gpt_logs": result.gpt_logs,
-        }
-        meta_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        self.results.save(result)
 
     def load_result(self, file_id: str) -> Optional[ProcessingResult]:
-        meta_path = self._metadata_path(file_id)
-        if not meta_path.exists():
-            return None
-
-        data = json.loads(meta_path.read_text(encoding="utf-8"))
-        entities = [
-            SensitiveEntity(
-                type=item.get("type", ""),
-                text=item.get("text", ""),
-                start=int(item.get("start", 0)),
-                end=int(item.get("end", 0)),
-            )
-            for item in data.get("entities", [])
-        ]
-
-        return ProcessingResult(
-            file_id=data["file_id"],
-            original_filename=data["original_filename"],
-            uploaded_path=Path(data["uploaded_path"]),
-            masked_path=Path(data["masked_path"]),
-            full_text=data["full_text"],
-            masked_text=data["masked_text"],
-            entities=entities,
-            gpt_logs=data.get("gpt_logs", []),
-        )
-
-    def cleanup(self, max_age_seconds: int = 60 * 60 * 24) -> None:
-        now = time.time()
-        for path in self.temp_dir.glob("*"):
+        return self.results.load(file_id)
+
+    def load_summary(self, file_id: str) -> Optional[ResultSummary]:
+        return self.results.load_summary(file_id)
+
+    def track_files(self, file_id: str, paths: Iterable[Path]) -> None:
+        self.expiry.track(file_id, paths)
+
+    def forget_results(self, file_ids: List[str]) -> None:
+        self.results.delete(file_ids)
+
+    def _import_legacy_results(self) -> None:
+        # Before the result database, each result was a {file_id}.json blob in TEMP_DIR.
+        imported = 0
+        for path in self.temp_dir.glob("*.json"):
             try:
-                if now - path.stat().st_mtime > max_age_seconds:
-                    path.unlink(missing_ok=True)
+                data = json.loads(path.read_text(encoding="utf-8"))
+                result = ProcessingResult(
+                    file_id=data["file_id"],
+                    original_filename=data["original_filename"],
+                    uploaded_path=Path(data["uploaded_path"]),
+                    masked_path=Path(data["masked_path"]),
+                    document=DocumentModel.from_blocks(
+                        [TextBlock(page=None, text=data["full_text"], start_offset=0)]
+                    ),
+                    masked_blocks=[data["masked_text"]],
+                    entities=EntitySet.from_entities(
+                        SensitiveEntity(
+                            type=item.get("type", ""),
+                            text=item.get("text", ""),
+                            start=int(item.get("start", 0)),
+                            end=int(item.get("end", 0)),
+                        )
+                        for item in data.get("entities", [])
+                    ),
+                    gpt_logs=data.get("gpt_logs", []),
+                    content_hash=data.get("content_hash", ""),
+                )
             except Exception as exc:  # noqa: BLE001
-                logger.warning("Cleanup skipped for %s: %s", path, exc)
+                logger.warning("Legacy result %s is unreadable, skipping: %s", path, exc)
+                continue
+
+            if self.results.load_summary(result.file_id) is None:
+                self.results.save(result)
+                self.expiry.track(result.file_id, [result.uploaded_path, result.masked_path])
+                imported += 1
+            path.unlink(missing_ok=True)
 
-    def _metadata_path(self, file_id: str) -> Path:
-        return self.temp_dir / f"{file_id}.json"
+        if imported:
+            logger.info("Imported %s legacy JSON results into the result database", imported)
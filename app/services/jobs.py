@@ -0,0 +1,179 @@
+import asyncio
+import json
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+@dataclass
+class Job:
+    job_id: str
+    file_id: str
+    original_filename: str
+    uploaded_path: Path
+    content_type: Optional[str] = None
+    content_hash: str = ""
+    status: str = STATUS_QUEUED
+    stage: str = STATUS_QUEUED
+    error: str = ""
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in {STATUS_DONE, STATUS_FAILED}
+
+
+JobHandler = Callable[[Job, Callable[[str], None]], Awaitable[None]]
+JobListener = Callable[[Job], None]
+
+
+class JobQueue:
+    def __init__(self, jobs_dir: Path, workers: int, handler: JobHandler, on_change: Optional[JobListener] = None):
+        self.jobs_dir = jobs_dir
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self.workers = max(1, workers)
+        self.handler = handler
+        self.on_change = on_change
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._active: Dict[str, Job] = {}
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._writes: Dict[str, Future] = {}
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        for job in self._recover():
+            self._active[job.job_id] = job
+            self._queue.put_nowait(job.job_id)
+        self._tasks = [asyncio.create_task(self._worker(index)) for index in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+            self._writer = None
+
+    def submit(self, job: Job) -> Job:
+        self._persist(job)
+        self._active[job.job_id] = job
+        self._queue.put_nowait(job.job_id)
+        return job
+
+    def get_active(self, job_id: str) -> Optional[Job]:
+        return self._active.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        job = self._active.get(job_id)
+        if job is not None:
+            return job
+        return self._load(self.job_path(job_id))
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def job_path(self, job_id: str) -> Path:
+        return self.jobs_dir / f"{job_id}.json"
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job_id = await self._queue.get()
+            job = self._active.get(job_id)
+            try:
+                if job is not None:
+                    await self._run(job)
+            finally:
+                # Keep the job readable from memory until its final state is on disk.
+                write = self._writes.pop(job_id, None)
+                if write is not None:
+                    await asyncio.wrap_future(write)
+                self._active.pop(job_id, None)
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        job.status = STATUS_RUNNING
+        self._set_stage(job, "started")
+        try:
+            await self.handler(job, lambda stage: self._set_stage(job, stage))
+        except asyncio.CancelledError:
+            job.status = STATUS_QUEUED
+            self._set_stage(job, STATUS_QUEUED)
+            raise
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("Job %s failed at stage %s", job.job_id, job.stage)
+            job.status = STATUS_FAILED
+            job.error = str(exc) or type(exc).__name__
+            self._persist(job)
+            return
+
+        job.status = STATUS_DONE
+        self._set_stage(job, STATUS_DONE)
+
+    def _set_stage(self, job: Job, stage: str) -> None:
+        job.stage = stage
+        self._persist(job)
+
+    def _recover(self) -> List[Job]:
+        pending = []
+        for path in self.jobs_dir.glob("*.json"):
+            job = self._load(path)
+            if job is None or job.finished:
+                continue
+            job.status = STATUS_QUEUED
+            job.stage = STATUS_QUEUED
+            pending.append(job)
+
+        pending.sort(key=lambda item: item.created_at)
+        if pending:
+            logger.info("Re-queued %s unfinished jobs", len(pending))
+        return pending
+
+    def _persist(self, job: Job) -> None:
+        job.updated_at = time.time()
+        payload = asdict(job)
+        payload["uploaded_path"] = str(job.uploaded_path)
+        self._writes[job.job_id] = self._writer_pool().submit(self._write, self.job_path(job.job_id), payload)
+        if self.on_change is not None:
+            try:
+                self.on_change(job)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Job listener failed for %s: %s", job.job_id, exc)
+
+    def _writer_pool(self) -> ThreadPoolExecutor:
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jobs")
+        return self._writer
+
+    @staticmethod
+    def _write(path: Path, payload: Dict[str, Any]) -> None:
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+            tmp_path.replace(path)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Job file %s write failed: %s", path, exc)
+
+    def _load(self, path: Path) -> Optional[Job]:
+        if not path.exists():
+            return None
+
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            data["uploaded_path"] = Path(data["uploaded_path"])
+            return Job(**data)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Job file %s is unreadable: %s", path, exc)
+            return None
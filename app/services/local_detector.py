@@ -0,0 +1,67 @@
+import importlib
+import re
+from typing import Callable, Dict, List, Protocol
+
+from app.models.entity_model import SensitiveEntity
+from app.services.requisites import detect_requisites
+
+SURNAME = r"[А-ЯЁ][а-яё]+(?:-[А-ЯЁ][а-яё]+)?"
+FULL_NAME_RE = re.compile(
+    rf"(?<![^\W\d_]){SURNAME}\s+[А-ЯЁ][а-яё]+\s+[А-ЯЁ][а-яё]+(?:вич|вна|чна|оглы|кызы)(?![^\W\d_])"
+)
+INITIALS_RE = re.compile(
+    rf"(?<![^\W\d_])(?:{SURNAME}\s+[А-ЯЁ]\.\s?(?:[А-ЯЁ]\.)?|[А-ЯЁ]\.\s?(?:[А-ЯЁ]\.\s?)?{SURNAME}(?![^\W\d_]))"
+)
+COMPANY_RE = re.compile(
+    r"(?<![^\W\d_])(?:ООО|ОАО|ЗАО|ПАО|АО|НАО|ИП|НКО|АНО|ФГУП|ГУП|МУП|LLC|Ltd|JSC)\s*"
+    r"(?:[«\"“][^»\"”\n]{1,80}[»\"”]|(?:[А-ЯЁA-Z][\w-]+ ?){1,3})"
+)
+
+
+class LocalDetector(Protocol):
+    def detect(self, text: str) -> List[SensitiveEntity]: ...
+
+
+class RegexDetector:
+    def detect(self, text: str) -> List[SensitiveEntity]:
+        entities = detect_requisites(text)
+        entities.extend(_matches(text, COMPANY_RE, "COMPANY"))
+        entities.extend(_matches(text, FULL_NAME_RE, "PERSON"))
+        entities.extend(_matches(text, INITIALS_RE, "PERSON"))
+        return entities
+
+
+class RequisitesDetector:
+    def detect(self, text: str) -> List[SensitiveEntity]:
+        return detect_requisites(text)
+
+
+class NullDetector:
+    def detect(self, text: str) -> List[SensitiveEntity]:
+        return []
+
+
+BUILTIN_DETECTORS: Dict[str, Callable[[], LocalDetector]] = {
+    "regex": RegexDetector,
+    "requisites": RequisitesDetector,
+    "none": NullDetector,
+}
+
+
+def load_detector(name: str) -> LocalDetector:
+    factory = BUILTIN_DETECTORS.get(name.strip().lower())
+    if factory is None:
+        module_name, _, attribute = name.partition(":")
+        if not attribute:
+            raise ValueError(f"Unknown local detector {name!r}, expected one of {sorted(BUILTIN_DETECTORS)}")
+        factory = getattr(importlib.import_module(module_name), attribute)
+    return factory()
+
+
+def _matches(text: str, pattern: re.Pattern, entity_type: str) -> List[SensitiveEntity]:
+    entities = []
+    for match in pattern.finditer(text):
+        value = match.group(0).rstrip()
+        end = match.start() + len(value)
+        entities.append(SensitiveEntity(type=entity_type, text=value, start=match.start(), end=end))
+    return entities
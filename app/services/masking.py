@@ -1,7 +1,9 @@
 import html
-from typing import List
+from typing import Iterable, Iterator, List, Optional, Tuple
 
-from app.models.entity_model import MaskingOptions, SensitiveEntity, sort_entities
+from app.models.document_model import DocumentModel
+from app.models.entity_model import MaskingOptions, SensitiveEntity
+from app.models.entity_set import EntitySet
 
 CLASS_MAP = {
     "PERSON": "entity-person",
@@ -10,34 +12,70 @@ CLASS_MAP = {
     "REKVIZIT": "entity-rekvizit",
 }
 
+Entities = Iterable[SensitiveEntity]
+Part = Tuple[str, Optional[str], int, bool, bool]
 
-def mask_text(full_text: str, entities: List[SensitiveEntity], options: MaskingOptions) -> str:
-    masked_parts: list[str] = []
-    cursor = 0
 
-    for entity in sort_entities(entities):
-        if entity.start < cursor:
-            continue
-        masked_parts.append(full_text[cursor : entity.start])
-        masked_parts.append(options.render_mask(entity))
-        cursor = max(cursor, entity.end)
+def mask_blocks(document: DocumentModel, entities: Entities, options: MaskingOptions) -> List[str]:
+    return list(iter_masked_blocks(document, entities, options))
 
-    masked_parts.append(full_text[cursor:])
-    return "".join(masked_parts)
 
+def iter_masked_blocks(document: DocumentModel, entities: Entities, options: MaskingOptions) -> Iterator[str]:
+    for parts in _iter_block_parts(document, entities):
+        yield "".join(_render_mask_part(options, *part) for part in parts)
 
-def highlight_text(full_text: str, entities: List[SensitiveEntity]) -> str:
-    highlighted: list[str] = []
-    cursor = 0
 
-    for entity in sort_entities(entities):
-        if entity.start < cursor:
-            continue
-        highlighted.append(html.escape(full_text[cursor : entity.start]))
-        css_class = CLASS_MAP.get(entity.type.upper(), "entity-default")
-        entity_html = html.escape(full_text[entity.start : entity.end])
-        highlighted.append(f'<span class="{css_class}">{entity_html}</span>')
-        cursor = max(cursor, entity.end)
+def highlight_blocks(document: DocumentModel, entities: Entities) -> Iterator[str]:
+    for parts in _iter_block_parts(document, entities):
+        yield "".join(_render_highlight_part(text, entity_type) for text, entity_type, _, _, _ in parts)
 
-    highlighted.append(html.escape(full_text[cursor:]))
-    return "".join(highlighted)
+
+def _iter_block_parts(document: DocumentModel, entities: Entities) -> Iterator[List[Part]]:
+    spans = EntitySet.from_entities(entities).spans()
+    starts, ends, type_ids, types = spans.starts, spans.ends, spans.type_ids, spans.types
+    count = len(spans)
+    span_index = 0
+
+    for block in document.blocks:
+        block_start = block.start_offset
+        block_end = block_start + len(block.text)
+        cursor = block_start
+        parts: List[Part] = []
+
+        while span_index < count and starts[span_index] < block_end:
+            entity_start, entity_end = starts[span_index], ends[span_index]
+            start = max(entity_start, block_start)
+            end = min(entity_end, block_end)
+            if start > cursor:
+                parts.append((block.text[cursor - block_start : start - block_start], None, 0, False, False))
+            if end > start:
+                text = block.text[start - block_start : end - block_start]
+                entity_type = types[type_ids[span_index]]
+                parts.append((text, entity_type, entity_end - entity_start, start == entity_start, end == entity_end))
+            cursor = max(cursor, end)
+            if entity_end > block_end:
+                break
+            span_index += 1
+
+        if cursor < block_end:
+            parts.append((block.text[cursor - block_start :], None, 0, False, False))
+        yield parts
+
+
+def _render_mask_part(
+    options: MaskingOptions, text: str, entity_type: Optional[str], length: int, first: bool, last: bool
+) -> str:
+    if entity_type is None:
+        return text
+    if first and last:
+        return options.render(entity_type, length)
+    if options.style == "tags":
+        return options.render(entity_type, length) if first else ""
+    return "*" * len(text)
+
+
+def _render_highlight_part(text: str, entity_type: Optional[str]) -> str:
+    if entity_type is None:
+        return html.escape(text)
+    css_class = CLASS_MAP.get(entity_type.upper(), "entity-default")
+    return f'<span class="{css_class}">{html.escape(text)}</span>'
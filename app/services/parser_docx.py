@@ -1,19 +1,68 @@
 from pathlib import Path
+from typing import Iterator, List, Set
 
 from docx import Document
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+from docx.text.run import Run
 
 from app.models.document_model import DocumentModel, TextBlock
 
+HEADER_FOOTER_ATTRS = (
+    "header",
+    "first_page_header",
+    "even_page_header",
+    "footer",
+    "first_page_footer",
+    "even_page_footer",
+)
+
 
 def parse_docx(path: Path) -> DocumentModel:
     doc = Document(path)
     blocks = []
     offset = 0
 
-    for para in doc.paragraphs:
+    for para in iter_paragraphs(doc):
         text = para.text or ""
         text_with_break = text + "\n"
         blocks.append(TextBlock(page=None, text=text_with_break, start_offset=offset))
         offset += len(text_with_break)
 
     return DocumentModel.from_blocks(blocks)
+
+
+def iter_paragraphs(doc) -> Iterator[Paragraph]:
+    yield from _iter_container(doc, set())
+
+    seen_parts: Set[object] = set()
+    for section in doc.sections:
+        for attr in HEADER_FOOTER_ATTRS:
+            header_footer = getattr(section, attr)
+            if header_footer.is_linked_to_previous:
+                continue
+            if header_footer.part in seen_parts:
+                continue
+            seen_parts.add(header_footer.part)
+            yield from _iter_container(header_footer, set())
+
+
+def paragraph_runs(para: Paragraph) -> List[Run]:
+    return [Run(r, para) for r in para._p.xpath("w:r | w:hyperlink/w:r")]
+
+
+def _iter_container(container, seen_cells: Set[object]) -> Iterator[Paragraph]:
+    for item in container.iter_inner_content():
+        if isinstance(item, Table):
+            yield from _iter_table(item, seen_cells)
+        else:
+            yield item
+
+
+def _iter_table(table: Table, seen_cells: Set[object]) -> Iterator[Paragraph]:
+    for row in table.rows:
+        for cell in row.cells:
+            if cell._tc in seen_cells:
+                continue
+            seen_cells.add(cell._tc)
+            yield from _iter_container(cell, seen_cells)
@@ -1,19 +1,39 @@
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List, Sequence, Union
 
 import pytesseract
 from PIL import Image
 
 from app.models.document_model import DocumentModel, TextBlock
+from app.services.metrics import OCR_PAGE_SECONDS
 
+PageImage = Union[Image.Image, str]
 
-def parse_images(images: List[Image.Image], lang: str) -> DocumentModel:
+
+def parse_images(images: List[Image.Image], lang: str, workers: int = 1) -> DocumentModel:
+    return build_document(ocr_pages(images, lang, workers))
+
+
+def ocr_pages(images: Sequence[PageImage], lang: str, workers: int = 1) -> List[str]:
+    if workers > 1 and len(images) > 1:
+        with ThreadPoolExecutor(max_workers=min(workers, len(images)), thread_name_prefix="ocr") as executor:
+            return list(executor.map(partial(ocr_image, lang=lang), images))
+    return [ocr_image(image, lang) for image in images]
+
+
+def build_document(texts: List[str]) -> DocumentModel:
     blocks = []
     offset = 0
 
-    for idx, image in enumerate(images):
-        raw_text = pytesseract.image_to_string(image, lang=lang) or ""
-        text = raw_text.rstrip() + "\n"
-        blocks.append(TextBlock(page=idx + 1, text=text, start_offset=offset))
+    for idx, text in enumerate(texts):
+        blocks.append(TextBlock(page=idx + 1, text=text, start_offset=offset, ocr=True))
         offset += len(text)
 
     return DocumentModel.from_blocks(blocks)
+
+
+def ocr_image(image: PageImage, lang: str) -> str:
+    with OCR_PAGE_SECONDS.time():
+        raw_text = pytesseract.image_to_string(image, lang=lang) or ""
+    return raw_text.rstrip() + "\n"
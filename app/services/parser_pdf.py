@@ -1,42 +1,124 @@
+import logging
+import tempfile
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import pdfplumber
 from pdf2image import convert_from_path
 
-from app.models.document_model import DocumentModel, TextBlock
+from app.models.document_model import DocumentModel, OcrOptions, TextBlock
 from app.services import parser_ocr
 
+logger = logging.getLogger(__name__)
 
-def parse_pdf(path: Path, ocr_lang: str = "rus+eng") -> DocumentModel:
-    blocks = []
-    offset = 0
+
+def parse_pdf(path: Path, ocr_options: Optional[OcrOptions] = None) -> DocumentModel:
+    ocr_options = ocr_options or OcrOptions()
+    page_texts: Dict[int, str] = {}
+    ocr_page_numbers: List[int] = []
 
     with pdfplumber.open(path) as pdf:
         for page_index, page in enumerate(pdf.pages):
             text = page.extract_text() or ""
             cleaned = text.rstrip()
-            if cleaned:
-                page_text = cleaned + "\n"
-                blocks.append(
-                    TextBlock(page=page_index + 1, text=page_text, start_offset=offset)
+            page_texts[page_index + 1] = cleaned
+            if len(cleaned.strip()) < ocr_options.min_text_chars:
+                ocr_page_numbers.append(page_index + 1)
+
+    ocr_texts = _ocr_pages(path, ocr_page_numbers, ocr_options) if ocr_page_numbers else {}
+    page_texts.update(ocr_texts)
+
+    blocks = []
+    offset = 0
+
+    for page_number in sorted(page_texts):
+        cleaned = page_texts[page_number].rstrip()
+        if cleaned:
+            page_text = cleaned + "\n"
+            blocks.append(
+                TextBlock(
+                    page=page_number,
+                    text=page_text,
+                    start_offset=offset,
+                    ocr=page_number in ocr_texts,
                 )
-                offset += len(page_text)
+            )
+            offset += len(page_text)
 
-    if blocks:
-        return DocumentModel.from_blocks(blocks)
+    failed_pages = [page_number for page_number in ocr_page_numbers if page_number not in ocr_texts]
+    return DocumentModel.from_blocks(blocks, ocr_failed_pages=failed_pages)
 
-    ocr_document = _parse_pdf_with_ocr(path, ocr_lang)
-    if ocr_document:
-        return ocr_document
 
-    return DocumentModel(blocks=[], full_text="")
+def _ocr_pages(path: Path, page_numbers: List[int], options: OcrOptions) -> Dict[int, str]:
+    texts: Dict[int, str] = {}
+    window = max(1, options.page_window)
 
+    for index in range(0, len(page_numbers), window):
+        window_pages = page_numbers[index : index + window]
+        page_texts = _ocr_window(path, window_pages, options)
+        if page_texts is not None:
+            texts.update(zip(window_pages, page_texts))
 
-def _parse_pdf_with_ocr(path: Path, ocr_lang: str) -> Optional[DocumentModel]:
-    try:
-        images = convert_from_path(path)
-    except Exception:
-        return None
+    return texts
 
-    return parser_ocr.parse_images(images, lang=ocr_lang)
+
+def _page_runs(page_numbers: List[int]) -> Iterator[Tuple[int, int]]:
+    first_page = last_page = page_numbers[0]
+    for page_number in page_numbers[1:]:
+        if page_number == last_page + 1:
+            last_page = page_number
+            continue
+        yield first_page, last_page
+        first_page = last_page = page_number
+    yield first_page, last_page
+
+
+def _ocr_window(path: Path, page_numbers: List[int], options: OcrOptions) -> Optional[List[str]]:
+    if options.output_dir is None:
+        images = _rasterize(path, page_numbers, options)
+        if images is None:
+            return None
+        try:
+            return parser_ocr.ocr_pages(images, lang=options.lang, workers=options.workers)
+        finally:
+            for image in images:
+                image.close()
+
+    options.output_dir.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=options.output_dir) as output_folder:
+        image_paths = _rasterize(path, page_numbers, options, output_folder=output_folder)
+        if image_paths is None:
+            return None
+        return parser_ocr.ocr_pages(image_paths, lang=options.lang, workers=options.workers)
+
+
+def _rasterize(
+    path: Path, page_numbers: List[int], options: OcrOptions, output_folder: Optional[str] = None
+) -> Optional[list]:
+    extra = {} if output_folder is None else {"output_folder": output_folder, "fmt": "png", "paths_only": True}
+    pages = []
+    for first_page, last_page in _page_runs(page_numbers):
+        try:
+            pages.extend(
+                convert_from_path(
+                    path,
+                    dpi=options.dpi,
+                    first_page=first_page,
+                    last_page=last_page,
+                    grayscale=options.grayscale,
+                    **extra,
+                )
+            )
+        except Exception:  # noqa: BLE001
+            logger.exception(
+                "Rasterizing %s pages %s-%s failed, skipping OCR for pages %s",
+                path.name,
+                first_page,
+                last_page,
+                page_numbers,
+            )
+            for page in pages:
+                if hasattr(page, "close"):
+                    page.close()
+            return None
+    return pages
@@ -0,0 +1,242 @@
+import io
+import logging
+import re
+import shutil
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+import pdfplumber
+import pypdfium2 as pdfium
+import pytesseract
+from PIL import Image, ImageDraw
+
+from app.models.document_model import DocumentModel, OcrOptions, TextBlock
+from app.models.entity_model import SensitiveEntity
+from app.models.entity_set import EntitySet
+
+logger = logging.getLogger(__name__)
+
+Box = Tuple[float, float, float, float]
+Span = Tuple[int, int]
+
+BOX_PADDING_PX = 2
+JPEG_QUALITY = 85
+WORD_RE = re.compile(r"\w+")
+
+
+class RedactionIncomplete(Exception):
+    """An entity could not be located on the rendered page, so it would stay readable."""
+
+
+def redact_pdf(
+    source: Path,
+    destination: Path,
+    document: DocumentModel,
+    entities: Iterable[SensitiveEntity],
+    ocr_options: OcrOptions,
+) -> None:
+    spans_by_block = _spans_by_block(document, entities)
+    if not spans_by_block:
+        shutil.copyfile(source, destination)
+        return
+
+    scale = ocr_options.dpi / 72
+    text_boxes: Dict[int, List[Box]] = {}
+    with pdfplumber.open(source) as plumber:
+        for block, spans in spans_by_block:
+            if not block.ocr:
+                page = plumber.pages[block.page - 1]
+                text_boxes[block.page] = _text_layer_boxes(page, block, spans, scale)
+
+    pdf = pdfium.PdfDocument(source)
+    try:
+        for block, spans in spans_by_block:
+            page = pdf[block.page - 1]
+            image = page.render(scale=scale).to_pil()
+            page.close()
+            boxes = text_boxes.get(block.page)
+            if boxes is None:
+                boxes = _ocr_boxes(image, block, spans, ocr_options.lang)
+            _burn_boxes(image, boxes)
+            _replace_page(pdf, block.page - 1, image, scale)
+        pdf.save(destination)
+    finally:
+        pdf.close()
+
+
+def redact_image(
+    source: Path,
+    destination: Path,
+    document: DocumentModel,
+    entities: Iterable[SensitiveEntity],
+    ocr_options: OcrOptions,
+) -> None:
+    with Image.open(source) as original:
+        image = original.convert("RGB")
+
+    for block, spans in _spans_by_block(document, entities):
+        _burn_boxes(image, _ocr_boxes(image, block, spans, ocr_options.lang))
+
+    image.save(destination, "PDF", resolution=float(ocr_options.dpi))
+
+
+def _spans_by_block(
+    document: DocumentModel, entities: Iterable[SensitiveEntity]
+) -> List[Tuple[TextBlock, List[Span]]]:
+    blocks = [block for block in document.blocks if block.page is not None]
+    starts = [block.start_offset for block in blocks]
+    spans: Dict[int, List[Span]] = {}
+
+    entity_set = EntitySet.from_entities(entities)
+    for entity_start, entity_end in zip(entity_set.starts, entity_set.ends):
+        index = max(0, bisect_right(starts, entity_start) - 1)
+        while index < len(blocks) and blocks[index].start_offset < entity_end:
+            block = blocks[index]
+            block_end = block.start_offset + len(block.text)
+            start = max(entity_start, block.start_offset) - block.start_offset
+            end = min(entity_end, block_end) - block.start_offset
+            if start < end:
+                spans.setdefault(index, []).append((start, end))
+            index += 1
+
+    return [(blocks[index], block_spans) for index, block_spans in sorted(spans.items())]
+
+
+def _text_layer_boxes(page, block: TextBlock, spans: List[Span], scale: float) -> List[Box]:
+    textmap = page.get_textmap()
+    origin_x, origin_top = page.cropbox[0], page.cropbox[1]
+
+    if textmap.as_string.rstrip() + "\n" != block.text:
+        logger.warning("Text layer of page %s changed since parsing, locating entities by search", block.page)
+        return _search_boxes(page, block, spans, scale)
+
+    chars = []
+    for text, char in textmap.tuples:
+        chars.extend([char] * len(text))
+
+    boxes: List[Box] = []
+    for start, end in spans:
+        found = len(boxes)
+        line_box = None
+        for char in chars[start:end]:
+            if char is None:
+                continue
+            if line_box is not None and abs(char["top"] - line_box[1]) < 1:
+                line_box = (
+                    min(line_box[0], char["x0"]),
+                    min(line_box[1], char["top"]),
+                    max(line_box[2], char["x1"]),
+                    max(line_box[3], char["bottom"]),
+                )
+                continue
+            if line_box is not None:
+                boxes.append(line_box)
+            line_box = (char["x0"], char["top"], char["x1"], char["bottom"])
+        if line_box is not None:
+            boxes.append(line_box)
+        if len(boxes) == found:
+            _unlocated(block, start, end)
+
+    return [_to_pixels(box, origin_x, origin_top, scale) for box in boxes]
+
+
+def _search_boxes(page, block: TextBlock, spans: List[Span], scale: float) -> List[Box]:
+    origin_x, origin_top = page.cropbox[0], page.cropbox[1]
+    boxes = []
+    for start, end in spans:
+        needle = block.text[start:end].strip()
+        if not needle:
+            continue
+        matches = page.search(needle, regex=False)
+        if not matches:
+            _unlocated(block, start, end)
+        for match in matches:
+            box = (match["x0"], match["top"], match["x1"], match["bottom"])
+            boxes.append(_to_pixels(box, origin_x, origin_top, scale))
+    return boxes
+
+
+def _ocr_boxes(image: Image.Image, block: TextBlock, spans: List[Span], lang: str) -> List[Box]:
+    # Words and entities are compared as one stream of lowercased word characters, so
+    # "И.И." or "123-45-67" match whether tesseract splits them into one word or several.
+    data = pytesseract.image_to_data(image, lang=lang, output_type=pytesseract.Output.DICT)
+    stream: List[str] = []
+    owners: List[int] = []
+    word_starts = set()
+    word_boxes: List[Box] = []
+    for index, word in enumerate(data["text"]):
+        normalized = _normalize(word)
+        if not normalized:
+            continue
+        left, top = data["left"][index], data["top"][index]
+        word_starts.add(len(owners))
+        stream.append(normalized)
+        owners.extend([len(word_boxes)] * len(normalized))
+        word_boxes.append((left, top, left + data["width"][index], top + data["height"][index]))
+    text = "".join(stream)
+    word_ends = {position - 1 for position in word_starts if position} | {len(owners) - 1}
+
+    boxes: List[Box] = []
+    for start, end in spans:
+        needle = _normalize(block.text[start:end])
+        if not needle:
+            continue
+        matches = []
+        position = text.find(needle)
+        while position >= 0:
+            matches.append(position)
+            position = text.find(needle, position + 1)
+        aligned = [
+            position for position in matches if position in word_starts and position + len(needle) - 1 in word_ends
+        ]
+        if not matches:
+            _unlocated(block, start, end)
+        for position in aligned or matches:
+            first, last = owners[position], owners[position + len(needle) - 1]
+            boxes.extend(word_boxes[first : last + 1])
+    return boxes
+
+
+def _normalize(text: str) -> str:
+    return "".join(WORD_RE.findall(text)).lower()
+
+
+def _unlocated(block: TextBlock, start: int, end: int) -> None:
+    logger.warning("Entity at %s-%s of page %s was not found on the rendered page", start, end, block.page)
+    raise RedactionIncomplete(f"Entity at {start}-{end} of page {block.page} could not be located")
+
+
+def _to_pixels(box: Box, origin_x: float, origin_top: float, scale: float) -> Box:
+    x0, top, x1, bottom = box
+    return (
+        (x0 - origin_x) * scale,
+        (top - origin_top) * scale,
+        (x1 - origin_x) * scale,
+        (bottom - origin_top) * scale,
+    )
+
+
+def _burn_boxes(image: Image.Image, boxes: List[Box]) -> None:
+    draw = ImageDraw.Draw(image)
+    for x0, top, x1, bottom in boxes:
+        draw.rectangle(
+            (x0 - BOX_PADDING_PX, top - BOX_PADDING_PX, x1 + BOX_PADDING_PX, bottom + BOX_PADDING_PX),
+            fill="black",
+        )
+
+
+def _replace_page(pdf: pdfium.PdfDocument, index: int, image: Image.Image, scale: float) -> None:
+    width, height = image.width / scale, image.height / scale
+    buffer = io.BytesIO()
+    image.convert("RGB").save(buffer, "JPEG", quality=JPEG_QUALITY)
+    buffer.seek(0)
+
+    page = pdf.new_page(width, height, index=index)
+    image_obj = pdfium.PdfImage.new(pdf)
+    image_obj.load_jpeg(buffer, inline=True)
+    image_obj.set_matrix(pdfium.PdfMatrix().scale(width, height))
+    page.insert_obj(image_obj)
+    page.gen_content()
+    page.close()
+    pdf.del_page(index + 1)
@@ -0,0 +1,128 @@
+import time
+from contextlib import contextmanager
+from functools import partial
+from typing import Callable, Dict, Iterator, Optional
+
+from app.config import Settings
+from app.models.document_model import OcrOptions
+from app.models.entity_model import MaskingOptions
+from app.models.entity_set import EntitySet
+from app.models.processing_result import ProcessingResult
+from app.services import document_parser, masking
+from app.services.chunking import block_boundaries
+from app.services.executor import StageExecutor
+from app.services.exporter import export_masked
+from app.services.file_storage import FileStorageService
+from app.services.jobs import Job
+from app.services.metrics import ENTITIES_DETECTED, PAGES_PARSED, STAGE_IN_FLIGHT, STAGE_SECONDS
+from app.services.progress import ProgressHub
+from app.services.yandex_gpt import YandexGPTClient, is_degraded
+
+
+async def process_job(
+    job: Job,
+    set_stage: Callable[[str], None],
+    settings: Settings,
+    storage: FileStorageService,
+    gpt_client: YandexGPTClient,
+    executor: StageExecutor,
+    progress: Optional[ProgressHub] = None,
+) -> ProcessingResult:
+    ocr_options = build_ocr_options(settings)
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+
+    set_stage("parse")
+    with _timed(timings, "parse"):
+        document = await executor.run(
+            "parse",
+            document_parser.parse_document,
+            job.uploaded_path,
+            job.content_type,
+            ocr_options,
+        )
+    for block in document.blocks:
+        PAGES_PARSED.inc(source="ocr" if block.ocr else "text")
+
+    set_stage("detect")
+    on_progress = partial(progress.publish, job.job_id) if progress is not None else None
+    with _timed(timings, "detect"), STAGE_IN_FLIGHT.track_in_progress(stage="detect"):
+        with STAGE_SECONDS.time(stage="detect"):
+            detected, gpt_logs = await gpt_client.detect_sensitive_data(
+                document.full_text, block_boundaries(document), on_progress=on_progress
+            )
+    if document.ocr_failed_pages:
+        gpt_logs.append({"direction": "degraded", "reason": "ocr_failed", "pages": document.ocr_failed_pages})
+    entities = EntitySet.from_entities(detected)
+    for entity_type, count in entities.type_counts().items():
+        ENTITIES_DETECTED.inc(count, type=entity_type)
+
+    set_stage("mask")
+    options = MaskingOptions(style=settings.mask_style)
+    with _timed(timings, "mask"):
+        masked_blocks = await executor.run("mask", masking.mask_blocks, document, entities, options)
+
+    set_stage("export")
+    with _timed(timings, "export"):
+        masked_path = await executor.run(
+            "export",
+            export_masked,
+            masked_blocks,
+            original_path=job.uploaded_path,
+            target_dir=settings.temp_dir,
+            entities=entities,
+            options=options,
+            document=document,
+            ocr_options=ocr_options,
+            logs=gpt_logs,
+        )
+        await executor.run("track_files", storage.track_files, job.file_id, [masked_path])
+
+    set_stage("save")
+    gpt_logs.append(
+        {
+            "direction": "timings",
+            "body": {stage: round(seconds, 4) for stage, seconds in timings.items()},
+            "total": round(time.perf_counter() - started, 4),
+            "blocks": len(document.blocks),
+            "ocr_blocks": sum(1 for block in document.blocks if block.ocr),
+            "chars": document.length,
+            "entities": len(entities),
+            "degraded": is_degraded(gpt_logs),
+        }
+    )
+    result = ProcessingResult(
+        file_id=job.file_id,
+        original_filename=job.original_filename,
+        uploaded_path=job.uploaded_path,
+        masked_path=masked_path,
+        document=document,
+        masked_blocks=masked_blocks,
+        entities=entities,
+        gpt_logs=gpt_logs,
+        content_hash=job.content_hash,
+        degraded=is_degraded(gpt_logs),
+    )
+    await executor.run("save_result", storage.save_result, result)
+    return result
+
+
+@contextmanager
+def _timed(timings: Dict[str, float], stage: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - started
+
+
+def build_ocr_options(settings: Settings) -> OcrOptions:
+    return OcrOptions(
+        lang=settings.ocr_lang,
+        workers=settings.ocr_workers,
+        dpi=settings.ocr_dpi,
+        grayscale=settings.ocr_grayscale,
+        page_window=settings.ocr_page_window,
+        min_text_chars=settings.ocr_min_text_chars,
+        output_dir=settings.temp_dir / "ocr" if settings.ocr_rasterize_to_disk else None,
+    )
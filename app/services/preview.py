@@ -0,0 +1,76 @@
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable, Iterable, List, Optional
+
+from app.models.document_model import DocumentModel, TextBlock
+from app.models.entity_model import SensitiveEntity
+from app.models.entity_set import EntitySet
+from app.services import masking
+
+PREVIEW_PAGE_CHARS = 20000
+
+
+@dataclass
+class PreviewPage:
+    page: int
+    first_block: int
+    last_block: int
+    start_offset: int
+    end_offset: int
+    label: str
+    entity_count: int = 0
+
+
+def paginate(document: DocumentModel, entities: Iterable[SensitiveEntity]) -> List[PreviewPage]:
+    pages: List[PreviewPage] = []
+    first = 0
+    for index, block in enumerate(document.blocks):
+        next_block = document.blocks[index + 1] if index + 1 < len(document.blocks) else None
+        if next_block is not None and not _page_break(document.blocks[first], block, next_block):
+            continue
+        start = document.blocks[first].start_offset
+        end = block.start_offset + len(block.text)
+        number = len(pages) + 1
+        label = f"Стр. {block.page}" if block.page is not None else f"Фрагмент {number}"
+        pages.append(PreviewPage(number, first, index, start, end, label))
+        first = index + 1
+
+    starts = EntitySet.from_entities(entities).starts
+    for page in pages:
+        page.entity_count = bisect_left(starts, page.end_offset) - bisect_left(starts, page.start_offset)
+    return pages
+
+
+def _page_break(first: TextBlock, block: TextBlock, next_block: TextBlock) -> bool:
+    if block.page is not None or next_block.page is not None:
+        return block.page != next_block.page
+    return next_block.start_offset - first.start_offset >= PREVIEW_PAGE_CHARS
+
+
+def render_page(blocks: List[TextBlock], entities: Iterable[SensitiveEntity]) -> str:
+    return "".join(masking.highlight_blocks(DocumentModel.from_blocks(blocks), entities))
+
+
+class FragmentCache:
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._items: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[str]:
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: str) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
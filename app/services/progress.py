@@ -0,0 +1,97 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Set, Tuple
+
+from app.services.jobs import Job
+
+Event = Tuple[int, str, Dict[str, Any]]
+
+
+@dataclass
+class _Channel:
+    history: Deque[Event]
+    subscribers: Set[asyncio.Queue] = field(default_factory=set)
+    next_id: int = 1
+    closed_at: Optional[float] = None
+
+
+class ProgressHub:
+    def __init__(self, history_limit: int = 2000, retention_seconds: float = 300.0):
+        self.history_limit = max(1, history_limit)
+        self.retention_seconds = retention_seconds
+        self._channels: Dict[str, _Channel] = {}
+
+    def publish(self, job_id: str, event: str, data: Dict[str, Any]) -> None:
+        channel = self._channel(job_id)
+        item = (channel.next_id, event, data)
+        channel.next_id += 1
+        channel.history.append(item)
+        for queue in channel.subscribers:
+            queue.put_nowait(item)
+
+    def job_changed(self, job: Job) -> None:
+        self.publish(
+            job.job_id,
+            "status",
+            {"status": job.status, "stage": job.stage, "error": job.error},
+        )
+        if job.finished:
+            self.close(job.job_id)
+
+    def close(self, job_id: str) -> None:
+        channel = self._channels.get(job_id)
+        if channel is None or channel.closed_at is not None:
+            return
+        channel.closed_at = time.monotonic()
+        for queue in channel.subscribers:
+            queue.put_nowait(None)
+        self._expire()
+
+    def has_channel(self, job_id: str) -> bool:
+        return job_id in self._channels
+
+    async def subscribe(
+        self, job_id: str, last_event_id: int = 0, heartbeat_seconds: float = 15.0
+    ) -> AsyncIterator[Optional[Event]]:
+        self._expire()
+        channel = self._channel(job_id)
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in channel.history:
+            if item[0] > last_event_id:
+                queue.put_nowait(item)
+        if channel.closed_at is not None:
+            queue.put_nowait(None)
+
+        channel.subscribers.add(queue)
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if item is None:
+                    return
+                yield item
+        finally:
+            channel.subscribers.discard(queue)
+
+    def _channel(self, job_id: str) -> _Channel:
+        channel = self._channels.get(job_id)
+        if channel is None:
+            self._expire()
+            channel = _Channel(history=deque(maxlen=self.history_limit))
+            self._channels[job_id] = channel
+        return channel
+
+    def _expire(self) -> None:
+        deadline = time.monotonic() - self.retention_seconds
+        expired = [
+            job_id
+            for job_id, channel in self._channels.items()
+            if channel.closed_at is not None and channel.closed_at < deadline and not channel.subscribers
+        ]
+        for job_id in expired:
+            del self._channels[job_id]
@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS expiry_entries (
+    file_id TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_expiry_entries_expires_at ON expiry_entries (expires_at);
+
+CREATE TABLE IF NOT EXISTS expiry_paths (
+    file_id TEXT NOT NULL,
+    path TEXT NOT NULL,
+    PRIMARY KEY (file_id, path)
+);
+"""
+
+
+class ExpiryIndex:
+    def __init__(self, db_path: Path, ttl_seconds: int):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def track(self, file_id: str, paths: Iterable[Path]) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO expiry_entries (file_id, expires_at) VALUES (?, ?)"
+                " ON CONFLICT (file_id) DO NOTHING",
+                (file_id, time.time() + self.ttl_seconds),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO expiry_paths (file_id, path) VALUES (?, ?)",
+                ((file_id, str(path)) for path in paths),
+            )
+
+    def expired(self, now: float, limit: int) -> List[Tuple[str, List[Path]]]:
+        with self._connect() as conn:
+            file_ids = [
+                row[0]
+                for row in conn.execute(
+                    "SELECT file_id FROM expiry_entries WHERE expires_at <= ? ORDER BY expires_at LIMIT ?",
+                    (now, limit),
+                )
+            ]
+            paths: Dict[str, List[Path]] = {file_id: [] for file_id in file_ids}
+            for file_id in file_ids:
+                for row in conn.execute("SELECT path FROM expiry_paths WHERE file_id = ?", (file_id,)):
+                    paths[file_id].append(Path(row[0]))
+        return list(paths.items())
+
+    def forget(self, file_ids: List[str]) -> None:
+        with self._connect() as conn:
+            conn.executemany("DELETE FROM expiry_paths WHERE file_id = ?", ((file_id,) for file_id in file_ids))
+            conn.executemany("DELETE FROM expiry_entries WHERE file_id = ?", ((file_id,) for file_id in file_ids))
+
+    def backlog(self, now: float) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM expiry_entries WHERE expires_at <= ?", (now,)).fetchone()[0]
+
+    def tracked(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM expiry_entries").fetchone()[0]
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        with closing(sqlite3.connect(self.db_path, timeout=30)) as conn:
+            with conn:
+                yield conn
+
+
+class TempReaper:
+    def __init__(
+        self,
+        index: ExpiryIndex,
+        on_reaped: Callable[[List[str]], None],
+        interval_seconds: float = 60.0,
+        batch_size: int = 200,
+        max_batches_per_tick: int = 50,
+    ):
+        self.index = index
+        self.on_reaped = on_reaped
+        self.interval_seconds = interval_seconds
+        self.batch_size = max(1, batch_size)
+        self.max_batches_per_tick = max(1, max_batches_per_tick)
+        self.entries_reaped = 0
+        self.files_deleted = 0
+        self.bytes_reclaimed = 0
+        self.errors = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def reap_batch(self, now: Optional[float] = None) -> int:
+        batch = self.index.expired(now or time.time(), self.batch_size)
+        for _, paths in batch:
+            for path in paths:
+                self._delete(path)
+
+        file_ids = [file_id for file_id, _ in batch]
+        if file_ids:
+            self.on_reaped(file_ids)
+            self.index.forget(file_ids)
+            self.entries_reaped += len(file_ids)
+        return len(file_ids)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries_reaped": self.entries_reaped,
+            "files_deleted": self.files_deleted,
+            "bytes_reclaimed": self.bytes_reclaimed,
+            "errors": self.errors,
+            "backlog": self.index.backlog(time.time()),
+            "tracked": self.index.tracked(),
+        }
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                for _ in range(self.max_batches_per_tick):
+                    if await run_in_threadpool(self.reap_batch) < self.batch_size:
+                        break
+            except Exception:  # noqa: BLE001
+                logger.exception("Temp reaper pass failed")
+            await asyncio.sleep(self.interval_seconds)
+
+    def _delete(self, path: Path) -> None:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            return
+        except Exception as exc:  # noqa: BLE001
+            self.errors += 1
+            logger.warning("Reaper skipped %s: %s", path, exc)
+            return
+        self.files_deleted += 1
+        self.bytes_reclaimed += size
@@ -0,0 +1,166 @@
+from bisect import bisect_left
+from collections import defaultdict, deque
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.models.entity_model import SensitiveEntity
+
+PROPAGATION_MIN_CHARS = 3
+QUOTES = str.maketrans({char: '"' for char in "«»„“”‟'‘’‚‛`"})
+
+
+class AhoCorasick:
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = list(dict.fromkeys(pattern for pattern in patterns if pattern))
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = next_state
+            self._out[state].append(index)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._out[next_state].extend(self._out[self._fail[next_state]])
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self.patterns
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in out[state]:
+                yield position + 1 - len(patterns[index]), position + 1, index
+
+
+def reconcile_entities(text: str, entities: List[SensitiveEntity]) -> Tuple[List[SensitiveEntity], int]:
+    haystack, fold = _haystack(text, entities)
+    needles = [fold(entity.text.strip()) for entity in entities]
+    occurrences = _occurrences(haystack, needles)
+
+    reconciled: List[SensitiveEntity] = []
+    unlocated = 0
+    normalized = None
+    for entity, needle in zip(entities, needles):
+        starts = occurrences.get(needle)
+        claimed = (entity.start, entity.end) if 0 <= entity.start < entity.end <= len(text) else None
+        if starts:
+            start = _nearest(starts, entity.start)
+            span = (start, start + len(needle))
+        elif not needle:
+            span = claimed
+        else:
+            if normalized is None:
+                normalized = _normalize(text)
+            span = _find_normalized(normalized, entity.text, entity.start)
+            if span is None:
+                unlocated += 1
+                span = claimed
+        if span is not None:
+            start, end = span
+            reconciled.append(SensitiveEntity(type=entity.type, text=text[start:end], start=start, end=end))
+    return reconciled, unlocated
+
+
+def propagate_entities(text: str, entities: List[SensitiveEntity]) -> List[SensitiveEntity]:
+    candidates = [entity for entity in entities if len(entity.text.strip()) >= PROPAGATION_MIN_CHARS]
+    if not candidates:
+        return list(entities)
+
+    haystack, fold = _haystack(text, candidates)
+    types: Dict[str, str] = {}
+    for entity in candidates:
+        types.setdefault(fold(entity.text.strip()), entity.type)
+
+    known = {(entity.start, entity.end) for entity in entities}
+    propagated = list(entities)
+    matcher = AhoCorasick(types)
+    for start, end, index in matcher.finditer(haystack):
+        if (start, end) in known or not _on_word_boundary(text, start, end):
+            continue
+        known.add((start, end))
+        propagated.append(
+            SensitiveEntity(type=types[matcher.patterns[index]], text=text[start:end], start=start, end=end)
+        )
+    return propagated
+
+
+def _haystack(text: str, entities: List[SensitiveEntity]):
+    folded = text.lower()
+    if len(folded) == len(text) and all(len(entity.text.lower()) == len(entity.text) for entity in entities):
+        return folded, str.lower
+    return text, str
+
+
+def _occurrences(haystack: str, needles: List[str]) -> Dict[str, List[int]]:
+    occurrences: Dict[str, List[int]] = defaultdict(list)
+    matcher = AhoCorasick(needles)
+    for start, _, index in matcher.finditer(haystack):
+        occurrences[matcher.patterns[index]].append(start)
+    return occurrences
+
+
+def _normalize(text: str) -> Tuple[str, List[int]]:
+    # Collapses whitespace runs and unifies quotes and case, remembering where each
+    # normalized character came from so matches map back onto the original text.
+    chars: List[str] = []
+    positions: List[int] = []
+    for position, char in enumerate(text):
+        if char.isspace():
+            if chars and chars[-1] == " ":
+                continue
+            char = " "
+        chars.append(char.translate(QUOTES).lower()[:1])
+        positions.append(position)
+    return "".join(chars), positions
+
+
+def _find_normalized(normalized: Tuple[str, List[int]], needle: str, claimed: int) -> Optional[Tuple[int, int]]:
+    haystack, positions = normalized
+    needle = _normalize(needle.strip())[0]
+    if not needle:
+        return None
+    starts = []
+    index = haystack.find(needle)
+    while index >= 0:
+        starts.append(index)
+        index = haystack.find(needle, index + 1)
+    if not starts:
+        return None
+    originals = [positions[index] for index in starts]
+    start = _nearest(originals, claimed)
+    index = starts[originals.index(start)]
+    return start, positions[index + len(needle) - 1] + 1
+
+
+def _nearest(starts: List[int], claimed: int) -> int:
+    index = bisect_left(starts, claimed)
+    if index == 0:
+        return starts[0]
+    if index == len(starts):
+        return starts[-1]
+    before, after = starts[index - 1], starts[index]
+    return before if claimed - before <= after - claimed else after
+
+
+def _on_word_boundary(text: str, start: int, end: int) -> bool:
+    before = text[start - 1] if start > 0 else " "
+    after = text[end] if end < len(text) else " "
+    return not before.isalnum() and not after.isalnum()
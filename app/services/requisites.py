@@ -0,0 +1,94 @@
+import re
+from bisect import bisect_left
+from typing import Callable, List, Optional, Tuple
+
+from app.models.entity_model import SensitiveEntity
+
+ENTITY_TYPE = "REKVIZIT"
+
+INN10_WEIGHTS = (2, 4, 10, 3, 5, 9, 4, 6, 8)
+INN11_WEIGHTS = (7, 2, 4, 10, 3, 5, 9, 4, 6, 8)
+INN12_WEIGHTS = (3, 7, 2, 4, 10, 3, 5, 9, 4, 6, 8)
+
+LABELS_RE = re.compile(
+    r"(?<![^\W\d_])(?:ИНН|КПП|ОГРНИП|ОГРН|БИК|р/с|к/с|л/с|расч[её]тный|корреспондентский|лицевой|сч[её]т|корр|"
+    r"тел|телефон|моб|факс|e-mail|email|почта|эл|электронная|INN|KPP|OGRN|BIK|phone|tel|fax|mail)(?![^\W\d_])",
+    re.IGNORECASE,
+)
+WORD_RE = re.compile(r"[^\W\d_]{2,}")
+
+
+def checksum(digits: str, weights: Tuple[int, ...]) -> int:
+    return sum(int(d) * w for d, w in zip(digits, weights)) % 11 % 10
+
+
+def _valid_inn(value: str) -> bool:
+    if len(value) == 10:
+        return checksum(value, INN10_WEIGHTS) == int(value[9])
+    if len(value) == 12:
+        return checksum(value, INN11_WEIGHTS) == int(value[10]) and checksum(
+            value, INN12_WEIGHTS
+        ) == int(value[11])
+    return False
+
+
+def _valid_ogrn(value: str) -> bool:
+    if len(value) == 13:
+        return int(value[:12]) % 11 % 10 == int(value[12])
+    if len(value) == 15:
+        return int(value[:14]) % 13 % 10 == int(value[14])
+    return False
+
+
+PATTERNS: List[Tuple[re.Pattern, Optional[Callable[[str], bool]]]] = [
+    (re.compile(r"(?<!\d)(\d{10}|\d{12})(?!\d)"), _valid_inn),
+    (re.compile(r"(?<!\d)(\d{13}|\d{15})(?!\d)"), _valid_ogrn),
+    (re.compile(r"(?<!\d)(\d{20})(?!\d)"), None),
+    (re.compile(r"(?:КПП|KPP)\s*:?\s*(\d{4}[\dA-Z]{2}\d{3})(?!\d)", re.IGNORECASE), None),
+    (re.compile(r"(?:БИК|BIK)\s*:?\s*(04\d{7})(?!\d)", re.IGNORECASE), None),
+    (
+        re.compile(r"(?<![\d+])((?:\+7|8)[\s-]?\(?\d{3}\)?[\s-]?\d{3}[\s-]?\d{2}[\s-]?\d{2})(?!\d)"),
+        None,
+    ),
+    (re.compile(r"([\w.+-]+@[\w-]+(?:\.[\w-]+)*\.[A-Za-zА-Яа-я]{2,})"), None),
+]
+
+
+def detect_requisites(text: str) -> List[SensitiveEntity]:
+    spans: List[Tuple[int, int]] = []
+    for pattern, validator in PATTERNS:
+        for match in pattern.finditer(text):
+            value = match.group(1)
+            if validator is not None and not validator(value):
+                continue
+            spans.append((match.start(1), match.end(1)))
+
+    entities: List[SensitiveEntity] = []
+    cursor = 0
+    for start, end in sorted(spans, key=lambda span: (span[0], -span[1])):
+        if start < cursor:
+            continue
+        entities.append(SensitiveEntity(type=ENTITY_TYPE, text=text[start:end], start=start, end=end))
+        cursor = end
+    return entities
+
+
+def is_requisites_only(chunk: str, offset: int, entities: List[SensitiveEntity]) -> bool:
+    starts = [entity.start for entity in entities]
+    index = max(0, bisect_left(starts, offset) - 1)
+    chunk_end = offset + len(chunk)
+    residual: List[str] = []
+    cursor = offset
+
+    for entity in entities[index:]:
+        if entity.start >= chunk_end:
+            break
+        if entity.end <= cursor:
+            continue
+        if entity.start > cursor:
+            residual.append(chunk[cursor - offset : entity.start - offset])
+        cursor = min(entity.end, chunk_end)
+
+    residual.append(chunk[cursor - offset :])
+    remainder = LABELS_RE.sub(" ", " ".join(residual))
+    return WORD_RE.search(remainder) is None
@@ -0,0 +1,317 @@
+import json
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from app.models.document_model import DocumentModel, TextBlock
+from app.models.entity_set import EntitySet
+from app.models.processing_result import ProcessingResult
+from app.services.preview import PreviewPage, paginate
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    file_id TEXT PRIMARY KEY,
+    original_filename TEXT NOT NULL,
+    uploaded_path TEXT NOT NULL,
+    masked_path TEXT NOT NULL,
+    content_hash TEXT NOT NULL DEFAULT '',
+    entity_count INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    degraded INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_results_content_hash ON results (content_hash);
+CREATE INDEX IF NOT EXISTS idx_results_created_at ON results (created_at);
+
+CREATE TABLE IF NOT EXISTS text_blocks (
+    file_id TEXT NOT NULL REFERENCES results (file_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    page INTEGER,
+    start_offset INTEGER NOT NULL,
+    ocr INTEGER NOT NULL DEFAULT 0,
+    text TEXT NOT NULL,
+    masked_text TEXT NOT NULL,
+    PRIMARY KEY (file_id, position)
+);
+
+CREATE TABLE IF NOT EXISTS entity_chunks (
+    file_id TEXT NOT NULL REFERENCES results (file_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    start_offset INTEGER NOT NULL,
+    end_offset INTEGER NOT NULL,
+    type_counts TEXT NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (file_id, position)
+);
+
+CREATE TABLE IF NOT EXISTS preview_pages (
+    file_id TEXT NOT NULL REFERENCES results (file_id) ON DELETE CASCADE,
+    page INTEGER NOT NULL,
+    first_block INTEGER NOT NULL,
+    last_block INTEGER NOT NULL,
+    start_offset INTEGER NOT NULL,
+    end_offset INTEGER NOT NULL,
+    label TEXT NOT NULL,
+    entity_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (file_id, page)
+);
+
+CREATE TABLE IF NOT EXISTS gpt_logs (
+    file_id TEXT NOT NULL REFERENCES results (file_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (file_id, position)
+);
+"""
+
+ENTITY_CHUNK_SIZE = 2000
+
+
+@dataclass
+class ResultSummary:
+    file_id: str
+    original_filename: str
+    masked_path: Path
+    content_hash: str
+    entity_count: int
+    created_at: float
+    degraded: bool = False
+
+
+class ResultStore:
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def save(self, result: ProcessingResult) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM results WHERE file_id = ?", (result.file_id,))
+            conn.execute(
+                "INSERT INTO results (file_id, original_filename, uploaded_path, masked_path, content_hash,"
+                " entity_count, created_at, degraded) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    result.file_id,
+                    result.original_filename,
+                    str(result.uploaded_path),
+                    str(result.masked_path),
+                    result.content_hash,
+                    len(result.entities),
+                    time.time(),
+                    int(result.degraded),
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO text_blocks (file_id, position, page, start_offset, ocr, text, masked_text)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (result.file_id, position, block.page, block.start_offset, int(block.ocr), block.text, masked)
+                    for position, (block, masked) in enumerate(zip(result.document.blocks, result.masked_blocks))
+                ),
+            )
+            _insert_entity_chunks(conn, result.file_id, result.entities)
+            _insert_preview_pages(conn, result.file_id, result.document, result.entities)
+            conn.executemany(
+                "INSERT INTO gpt_logs (file_id, position, payload) VALUES (?, ?, ?)",
+                (
+                    (result.file_id, position, json.dumps(log, ensure_ascii=False))
+                    for position, log in enumerate(result.gpt_logs)
+                ),
+            )
+
+    def load(self, file_id: str) -> Optional[ProcessingResult]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT file_id, original_filename, uploaded_path, masked_path, content_hash, degraded"
+                " FROM results WHERE file_id = ?",
+                (file_id,),
+            ).fetchone()
+            if row is None:
+                return None
+
+            blocks = []
+            masked_blocks = []
+            for item in conn.execute(
+                "SELECT page, start_offset, ocr, text, masked_text FROM text_blocks"
+                " WHERE file_id = ? ORDER BY position",
+                (file_id,),
+            ):
+                blocks.append(TextBlock(page=item[0], text=item[3], start_offset=item[1], ocr=bool(item[2])))
+                masked_blocks.append(item[4])
+
+            entities = EntitySet.concat(
+                [
+                    EntitySet.from_bytes(item[0])
+                    for item in conn.execute(
+                        "SELECT data FROM entity_chunks WHERE file_id = ? ORDER BY position", (file_id,)
+                    )
+                ]
+            )
+
+        return ProcessingResult(
+            file_id=row[0],
+            original_filename=row[1],
+            uploaded_path=Path(row[2]),
+            masked_path=Path(row[3]),
+            document=DocumentModel.from_blocks(blocks),
+            masked_blocks=masked_blocks,
+            entities=entities,
+            gpt_logs=self.load_gpt_logs(file_id),
+            content_hash=row[4],
+            degraded=bool(row[5]),
+        )
+
+    def load_summary(self, file_id: str) -> Optional[ResultSummary]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT file_id, original_filename, masked_path, content_hash, entity_count, created_at, degraded"
+                " FROM results WHERE file_id = ?",
+                (file_id,),
+            ).fetchone()
+        return _summary(row) if row else None
+
+    def load_gpt_logs(self, file_id: str, limit: int = -1, offset: int = 0) -> List[dict]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT payload FROM gpt_logs WHERE file_id = ? ORDER BY position LIMIT ? OFFSET ?",
+                (file_id, limit, offset),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def count_gpt_logs(self, file_id: str) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM gpt_logs WHERE file_id = ?", (file_id,)).fetchone()[0]
+
+    def load_preview_pages(self, file_id: str) -> List[PreviewPage]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT page, first_block, last_block, start_offset, end_offset, label, entity_count"
+                " FROM preview_pages WHERE file_id = ? ORDER BY page",
+                (file_id,),
+            ).fetchall()
+        return [PreviewPage(*row) for row in rows]
+
+    def load_blocks(self, file_id: str, first: int, last: int) -> List[TextBlock]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT page, start_offset, ocr, text FROM text_blocks"
+                " WHERE file_id = ? AND position BETWEEN ? AND ? ORDER BY position",
+                (file_id, first, last),
+            ).fetchall()
+        return [TextBlock(page=row[0], text=row[3], start_offset=row[1], ocr=bool(row[2])) for row in rows]
+
+    def load_entities(self, file_id: str, start: int, end: int) -> EntitySet:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT data FROM entity_chunks"
+                " WHERE file_id = ? AND start_offset < ? AND end_offset > ? ORDER BY position",
+                (file_id, end, start),
+            ).fetchall()
+        return EntitySet.concat([EntitySet.from_bytes(row[0]) for row in rows]).overlapping(start, end)
+
+    def entity_counts(self, file_id: str) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        with self._connect() as conn:
+            for row in conn.execute("SELECT type_counts FROM entity_chunks WHERE file_id = ?", (file_id,)):
+                for entity_type, count in json.loads(row[0]).items():
+                    counts[entity_type] = counts.get(entity_type, 0) + count
+        return dict(sorted(counts.items()))
+
+    def list(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        content_hash: Optional[str] = None,
+        filename: Optional[str] = None,
+    ) -> List[ResultSummary]:
+        clauses = []
+        params: list = []
+        if content_hash:
+            clauses.append("content_hash = ?")
+            params.append(content_hash)
+        if filename:
+            clauses.append("original_filename LIKE ?")
+            params.append(f"%{filename}%")
+
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT file_id, original_filename, masked_path, content_hash, entity_count, created_at, degraded"
+                f" FROM results{where} ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                (*params, limit, offset),
+            ).fetchall()
+        return [_summary(row) for row in rows]
+
+    def delete(self, file_ids: List[str]) -> None:
+        if not file_ids:
+            return
+        with self._connect() as conn:
+            conn.executemany("DELETE FROM results WHERE file_id = ?", ((file_id,) for file_id in file_ids))
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        with closing(sqlite3.connect(self.db_path, timeout=30)) as conn:
+            conn.execute("PRAGMA foreign_keys=ON")
+            with conn:
+                yield conn
+
+
+def _insert_entity_chunks(conn: sqlite3.Connection, file_id: str, entities: EntitySet) -> None:
+    conn.executemany(
+        "INSERT INTO entity_chunks (file_id, position, start_offset, end_offset, type_counts, data)"
+        " VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            (
+                file_id,
+                position,
+                chunk.starts[0],
+                max(chunk.ends),
+                json.dumps(chunk.type_counts(), ensure_ascii=False),
+                chunk.to_bytes(),
+            )
+            for position, chunk in enumerate(_entity_chunks(entities))
+        ),
+    )
+
+
+def _insert_preview_pages(
+    conn: sqlite3.Connection, file_id: str, document: DocumentModel, entities: EntitySet
+) -> None:
+    conn.executemany(
+        "INSERT INTO preview_pages (file_id, page, first_block, last_block, start_offset, end_offset,"
+        " label, entity_count) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            (
+                file_id,
+                page.page,
+                page.first_block,
+                page.last_block,
+                page.start_offset,
+                page.end_offset,
+                page.label,
+                page.entity_count,
+            )
+            for page in paginate(document, entities)
+        ),
+    )
+
+
+def _entity_chunks(entities: EntitySet) -> Iterator[EntitySet]:
+    for low in range(0, len(entities), ENTITY_CHUNK_SIZE):
+        yield entities.slice(low, low + ENTITY_CHUNK_SIZE)
+
+
+def _summary(row) -> ResultSummary:
+    return ResultSummary(
+        file_id=row[0],
+        original_filename=row[1],
+        masked_path=Path(row[2]),
+        content_hash=row[3],
+        entity_count=row[4],
+        created_at=row[5],
+        degraded=bool(row[6]),
+    )
@@ -1,12 +1,34 @@
+import asyncio
 import json
 import logging
+import math
+import random
 import re
-from typing import List, Tuple, Dict, Any
+import time
+from dataclasses import asdict
+from email.utils import parsedate_to_datetime
+from typing import Callable, List, Optional, Sequence, Set, Tuple, Dict, Any, TypeVar
 
 import httpx
 
 from app.config import Settings
 from app.models.entity_model import SensitiveEntity
+from app.services.chunk_packer import ChunkPacker
+from app.services.chunking import chunk_limit, merge_entities, split_text
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.detection_cache import DetectionCache
+from app.services.entity_stream import CompactEntityParser, EntityStreamParser
+from app.services.executor import StageExecutor
+from app.services.local_detector import load_detector
+from app.services.metrics import (
+    GPT_CHUNK_SECONDS,
+    GPT_CHUNKS,
+    GPT_COMPLETION_TOKENS,
+    GPT_IN_FLIGHT,
+    GPT_RESPLITS,
+)
+from app.services.reconcile import propagate_entities, reconcile_entities
+from app.services.requisites import detect_requisites, is_requisites_only
 
 logger = logging.getLogger(__name__)
 
@@ -17,123 +39,460 @@ PROMPT_TEMPLATE = (
     "Текст:\n{payload}"
 )
 
+COMPACT_PROMPT_TEMPLATE = (
+    "Найди персональные данные, названия компаний, проекты и реквизиты в тексте. "
+    "Верни по одной сущности на строку в формате код|начало|текст, без JSON и пояснений. "
+    "Коды: P — человек, C — компания, J — проект, R — реквизит; начало — позиция первого символа сущности. "
+    "Пример строки: P|0|Иванов Иван. Если сущностей нет, верни пустой ответ. "
+    "Текст:\n{payload}"
+)
+
+PROMPT_TEMPLATES = {"json": PROMPT_TEMPLATE, "compact": COMPACT_PROMPT_TEMPLATE}
+PROMPT_VERSIONS = {"json": "1", "compact": "2"}
+TOKENS_PER_ENTITY = {"json": 32, "compact": 12}
+DENSITY_HEADROOM = 1.5
+DENSITY_SMOOTHING = 0.2
+TRUNCATED_STATUS = "ALTERNATIVE_STATUS_TRUNCATED_FINAL"
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+T = TypeVar("T")
+
+ProgressCallback = Callable[[str, Dict[str, Any]], None]
+EntityCallback = Callable[[List[SensitiveEntity]], None]
+
 
 class YandexGPTClient:
-    def __init__(self, settings: Settings):
+    def __init__(
+        self,
+        settings: Settings,
+        cache: Optional[DetectionCache] = None,
+        executor: Optional[StageExecutor] = None,
+    ):
         self.api_key = settings.yandex_gpt_api_key
         self.api_url = settings.yandex_gpt_api_url
         self.model_uri = settings.yandex_gpt_model_uri
         self.folder_id = settings.yandex_folder_id
         self.iam_token = settings.yandex_iam_token
-        self.chunk_size = settings.chunk_size
+        self.chunk_size = chunk_limit(
+            settings.chunk_size, settings.chunk_token_budget, settings.chunk_chars_per_token
+        )
+        self.chunk_overlap = settings.chunk_overlap
+        self.concurrency = max(1, settings.gpt_concurrency)
+        self.timeout = settings.gpt_timeout_seconds
+        self.limits = httpx.Limits(
+            max_connections=settings.gpt_max_connections,
+            max_keepalive_connections=settings.gpt_max_keepalive_connections,
+            keepalive_expiry=settings.gpt_keepalive_expiry_seconds,
+        )
+        self.max_retries = max(0, settings.gpt_max_retries)
+        self.backoff_base = settings.gpt_backoff_base_seconds
+        self.backoff_max = settings.gpt_backoff_max_seconds
+        self.local_detection = settings.local_detection
+        self.entity_propagation = settings.entity_propagation
+        self.stream = settings.gpt_stream
+        self.response_format = settings.gpt_response_format.lower()
+        if self.response_format not in PROMPT_TEMPLATES:
+            logger.warning("Unknown GPT_RESPONSE_FORMAT %r, using compact", settings.gpt_response_format)
+            self.response_format = "compact"
+        self.max_tokens = max(1, settings.gpt_max_tokens)
+        self.min_tokens = max(1, min(settings.gpt_min_tokens, self.max_tokens))
+        self.entity_density = max(0.0, settings.gpt_entity_density)
+        self.resplit_depth = max(0, settings.gpt_resplit_depth)
+        self.resplit_min_chars = max(1, settings.gpt_resplit_min_chars)
+        self._density = self.entity_density
+        self.breaker = CircuitBreaker(
+            window=settings.gpt_breaker_window,
+            min_calls=settings.gpt_breaker_min_calls,
+            failure_rate=settings.gpt_breaker_failure_rate,
+            slow_call_seconds=settings.gpt_breaker_slow_call_seconds,
+            slow_call_rate=settings.gpt_breaker_slow_call_rate,
+            open_seconds=settings.gpt_breaker_open_seconds,
+            half_open_calls=settings.gpt_breaker_half_open_calls,
+        )
+        self.degraded_detector = load_detector(settings.degraded_detector)
+        self.cache = cache
+        self.executor = executor
         self._headers = self._build_headers()
+        self.pack_threshold = max(0, settings.gpt_pack_threshold)
+        self._packer = ChunkPacker(
+            self._request_entities, max_chars=self.chunk_size, window_seconds=settings.gpt_pack_window_ms / 1000
+        )
+        self._http: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def start(self) -> None:
+        if self._http is None:
+            self._http = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def aclose(self) -> None:
+        await self._packer.flush()
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+            self._semaphore = None
 
-    async def detect_sensitive_data(self, text: str) -> Tuple[List[SensitiveEntity], List[Dict[str, Any]]]:
+    async def detect_sensitive_data(
+        self,
+        text: str,
+        boundaries: Optional[Sequence[int]] = None,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> Tuple[List[SensitiveEntity], List[Dict[str, Any]]]:
         if not text.strip():
             return [], []
 
+        local_entities = await self._offload("requisites", detect_requisites, text) if self.local_detection else []
+
         if not self.api_key and not self.iam_token:
-            logger.warning("YANDEX_GPT_API_KEY or YANDEX_IAM_TOKEN is not set. Returning empty entity list.")
-            return [], []
+            logger.warning("YANDEX_GPT_API_KEY or YANDEX_IAM_TOKEN is not set. Returning locally detected entities only.")
+            progress = _Progress(on_progress, total=1)
+            progress.emit("detect", {"chunks": 1, "chars": len(text)})
+            progress.entities(local_entities)
+            fallback, logs = await self._detect_locally(text, 0, "no_credentials", [], progress)
+            return await self._offload("merge_entities", merge_entities, text, local_entities + fallback), logs
 
-        entities: List[SensitiveEntity] = []
+        await self.start()
+        chunks = split_text(text, self.chunk_size, self.chunk_overlap, boundaries)
+        progress = _Progress(on_progress, total=len(chunks))
+        progress.emit("detect", {"chunks": len(chunks), "chars": len(text)})
+        progress.entities(local_entities)
+        results = await asyncio.gather(
+            *(self._process_chunk(chunk.text, chunk.offset, local_entities, progress) for chunk in chunks)
+        )
+
+        entities: List[SensitiveEntity] = list(local_entities)
         logs: List[Dict[str, Any]] = []
-        async with httpx.AsyncClient(timeout=60) as client:
-            for chunk_text, offset in _chunk_text(text, self.chunk_size):
-                request_body = self._build_request_body(chunk_text)
+        for chunk_entities, chunk_logs in results:
+            entities.extend(chunk_entities)
+            logs.extend(chunk_logs)
+        if self.entity_propagation:
+            entities = await self._offload("propagate", propagate_entities, text, entities)
+        return await self._offload("merge_entities", merge_entities, text, entities), logs
+
+    async def _process_chunk(
+        self,
+        chunk_text: str,
+        offset: int,
+        local_entities: List[SensitiveEntity],
+        progress: "_Progress",
+    ) -> Tuple[List[SensitiveEntity], List[Dict[str, Any]]]:
+        if local_entities and is_requisites_only(chunk_text, offset, local_entities):
+            GPT_CHUNKS.inc(outcome="local")
+            progress.chunk_done(offset, len(chunk_text), "local", 0)
+            return [], [{"direction": "local", "offset": offset, "length": len(chunk_text)}]
+
+        cache_key = self._cache_key(chunk_text)
+        if cache_key is not None:
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                GPT_CHUNKS.inc(outcome="cache")
+                progress.entities(cached, offset)
+                progress.chunk_done(offset, len(chunk_text), "cache", len(cached))
+                log = {"direction": "cache", "offset": offset, "length": len(chunk_text), "entities": len(cached)}
+                return _shift_entities(cached, offset), [log]
+
+        if not self.breaker.admit():
+            return await self._detect_locally(chunk_text, offset, "circuit_open", [], progress)
+
+        if self.pack_threshold and len(chunk_text) <= self.pack_threshold:
+            entities, logs = await self._packer.submit(chunk_text)
+            progress.entities(entities or [], offset)
+        else:
+            entities, logs = await self._request_entities(chunk_text, progress.entity_sink(offset))
+        for log in logs:
+            log["offset"] = offset
+
+        if entities is None:
+            if any(log["direction"] == "circuit_open" for log in logs):
+                reason = "circuit_open"
+            elif any(log.get("truncated") for log in logs):
+                reason = "truncated"
+            else:
+                reason = "gpt_failed"
+            return await self._detect_locally(chunk_text, offset, reason, logs, progress)
+        GPT_CHUNKS.inc(outcome="gpt")
+        progress.chunk_done(offset, len(chunk_text), "gpt", len(entities))
+        if cache_key is not None:
+            await self.cache.put(cache_key, entities)
+        return _shift_entities(entities, offset), logs
+
+    async def _detect_locally(
+        self,
+        chunk_text: str,
+        offset: int,
+        reason: str,
+        logs: List[Dict[str, Any]],
+        progress: "_Progress",
+    ) -> Tuple[List[SensitiveEntity], List[Dict[str, Any]]]:
+        GPT_CHUNKS.inc(outcome="degraded")
+        entities = await self._offload("degraded_detect", self.degraded_detector.detect, chunk_text)
+        logs.append(
+            {
+                "direction": "degraded",
+                "reason": reason,
+                "offset": offset,
+                "length": len(chunk_text),
+                "entities": len(entities),
+            }
+        )
+        progress.entities(entities, offset)
+        progress.chunk_done(offset, len(chunk_text), "degraded", len(entities))
+        return _shift_entities(entities, offset), logs
+
+    async def _offload(self, stage: str, func: Callable[..., T], *args: Any) -> T:
+        if self.executor is not None:
+            return await self.executor.run(stage, func, *args)
+        return await asyncio.to_thread(func, *args)
+
+    async def _request_entities(
+        self, text: str, on_entities: Optional[EntityCallback] = None, depth: int = 0, reconcile: bool = True
+    ) -> Tuple[Optional[List[SensitiveEntity]], List[Dict[str, Any]]]:
+        max_tokens = self._max_tokens(text)
+        request_body = self._build_request_body(text, max_tokens)
+        logs: List[Dict[str, Any]] = [{"direction": "request", "length": len(text), "body": request_body}]
+        sink = self._stream_sink(text, on_entities) if self.stream and on_entities is not None else None
+        try:
+            response = await self._post_with_retries(request_body, logs, sink)
+            if response.status_code == 401:
+                body = response.text[:2000]
+                logger.error("Unauthorized: check API key/IAM token. Body: %s", body)
                 logs.append(
                     {
-                        "direction": "request",
-                        "offset": offset,
-                        "length": len(chunk_text),
-                        "body": request_body,
+                        "direction": "error",
+                        "status": response.status_code,
+                        "error": "401 Unauthorized. Проверьте ключ/токен/права.",
+                        "body": body,
                     }
                 )
-                try:
-                    response = await client.post(self.api_url, headers=self._headers, json=request_body)
-                    if response.status_code == 401:
-                        body = response.text[:2000]
-                        logger.error("Unauthorized: check API key/IAM token. Body: %s", body)
-                        logs.append(
-                            {
-                                "direction": "error",
-                                "offset": offset,
-                                "status": response.status_code,
-                                "error": "401 Unauthorized. Проверьте ключ/токен/права.",
-                                "body": body,
-                            }
-                        )
-                        continue
-
-                    response.raise_for_status()
-                    logs.append(
-                        {
-                            "direction": "response",
-                            "offset": offset,
-                            "status": response.status_code,
-                            "body": response.text[:2000],
-                        }
-                    )
-                    entities.extend(self._parse_entities(response, offset))
-                except Exception as exc:  # noqa: BLE001
-                    error_message = str(exc)
-                    body = ""
-                    if isinstance(exc, httpx.HTTPStatusError) and exc.response is not None:
-                        body = exc.response.text[:2000]
-                    logger.error("Yandex GPT request failed: %s %s", error_message, body)
-                    logs.append(
-                        {
-                            "direction": "error",
-                            "offset": offset,
-                            "error": error_message,
-                            "body": body,
-                        }
-                    )
-                    continue
+                return None, logs
 
+            response.raise_for_status()
+            response_log = {"direction": "response", "status": response.status_code, "body": response.text[:2000]}
+            logs.append(response_log)
+            parsed = self._parse_entities(response, max_tokens)
+            if parsed is None:
+                return None, logs
+            entities, truncated = parsed
+            if reconcile:
+                entities, unlocated = reconcile_entities(text, entities)
+                if unlocated:
+                    response_log["unlocated"] = unlocated
+                    logs.append({"direction": "degraded", "reason": "unlocated_entities", "entities": unlocated})
+            self._observe_density(text, entities)
+        except CircuitOpenError as exc:
+            logs.append({"direction": "circuit_open", "error": str(exc)})
+            return None, logs
+        except Exception as exc:  # noqa: BLE001
+            error_message = str(exc)
+            body = ""
+            if isinstance(exc, httpx.HTTPStatusError) and exc.response is not None:
+                body = exc.response.text[:2000]
+            logger.error("Yandex GPT request failed: %s %s", error_message, body)
+            logs.append({"direction": "error", "error": error_message, "body": body})
+            return None, logs
+
+        if truncated:
+            response_log["truncated"] = True
+            if depth < self.resplit_depth and len(text) >= 2 * self.resplit_min_chars:
+                # Parts only report entities the truncated stream has not already emitted.
+                on_parts = sink.forward if sink is not None else on_entities
+                return await self._resplit(text, on_parts, depth, logs, reconcile)
+            logger.warning("Yandex GPT reply truncated at %s tokens for %s chars", max_tokens, len(text))
+            logs.append({"direction": "error", "error": f"Reply truncated at {max_tokens} tokens"})
+            return None, logs
+        if sink is not None:
+            sink.finish()
+        elif on_entities is not None:
+            on_entities(entities)
         return entities, logs
 
-    def _parse_entities(self, response: httpx.Response, offset: int) -> List[SensitiveEntity]:
-        data = response.json()
-        text_payload = (
-            data.get("result", {})
-            .get("alternatives", [{}])[0]
-            .get("message", {})
-            .get("text")
+    async def _resplit(
+        self,
+        text: str,
+        on_entities: Optional[EntityCallback],
+        depth: int,
+        logs: List[Dict[str, Any]],
+        reconcile: bool = True,
+    ) -> Tuple[Optional[List[SensitiveEntity]], List[Dict[str, Any]]]:
+        GPT_RESPLITS.inc()
+        parts = split_text(text, math.ceil(len(text) / 2))
+        logs.append({"direction": "resplit", "parts": len(parts), "depth": depth + 1})
+        results = await asyncio.gather(
+            *(
+                self._request_entities(part.text, _shifted_sink(on_entities, part.offset), depth + 1, reconcile)
+                for part in parts
+            )
         )
+
+        entities: List[SensitiveEntity] = []
+        failed = False
+        for part, (part_entities, part_logs) in zip(parts, results):
+            for log in part_logs:
+                log.setdefault("part_offset", part.offset)
+            logs.extend(part_logs)
+            if part_entities is None:
+                failed = True
+            else:
+                entities.extend(_shift_entities(part_entities, part.offset))
+        return (None if failed else entities), logs
+
+    async def _post_with_retries(
+        self,
+        request_body: dict,
+        logs: List[Dict[str, Any]],
+        sink: Optional["_StreamSink"] = None,
+    ) -> httpx.Response:
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    if not self.breaker.allow():
+                        raise CircuitOpenError("GPT circuit breaker is open")
+                    started = time.perf_counter()
+                    try:
+                        with GPT_IN_FLIGHT.track_in_progress():
+                            if self.stream:
+                                response = await self._post_stream(request_body, sink)
+                            else:
+                                response = await self._http.post(
+                                    self.api_url, headers=self._headers, json=request_body
+                                )
+                    except httpx.TransportError:
+                        self.breaker.record(False, time.perf_counter() - started)
+                        raise
+                    except BaseException:
+                        self.breaker.release()
+                        raise
+                    self.breaker.record(response.status_code not in RETRY_STATUSES, time.perf_counter() - started)
+            except httpx.TransportError as exc:
+                GPT_CHUNK_SECONDS.observe(time.perf_counter() - started, outcome="transport_error")
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff_delay(attempt)
+                error = str(exc) or type(exc).__name__
+            else:
+                GPT_CHUNK_SECONDS.observe(time.perf_counter() - started, outcome=str(response.status_code))
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                delay = _retry_after_seconds(response)
+                if delay is None:
+                    delay = self._backoff_delay(attempt)
+                else:
+                    delay = min(delay, self.backoff_max)
+                error = f"HTTP {response.status_code}"
+
+            attempt += 1
+            logger.warning("Yandex GPT request retry %s in %.2fs: %s", attempt, delay, error)
+            logs.append(
+                {
+                    "direction": "retry",
+                    "attempt": attempt,
+                    "delay": round(delay, 3),
+                    "error": error,
+                }
+            )
+            await asyncio.sleep(delay)
+
+    async def _post_stream(self, request_body: dict, sink: Optional["_StreamSink"]) -> httpx.Response:
+        async with self._http.stream("POST", self.api_url, headers=self._headers, json=request_body) as response:
+            if response.status_code != 200:
+                await response.aread()
+                return response
+
+            if sink is not None:
+                sink.restart()
+
+            lines: List[str] = []
+            async for line in response.aiter_lines():
+                line = line.strip()
+                if line.startswith("data:"):
+                    line = line[len("data:") :].strip()
+                if not line or line == "[DONE]":
+                    continue
+                lines.append(line)
+                if sink is not None:
+                    text = _stream_line_text(line)
+                    if text:
+                        sink(text)
+
+        return httpx.Response(response.status_code, content=_final_stream_payload(lines), request=response.request)
+
+    def _stream_sink(self, text: str, on_entities: EntityCallback) -> "_StreamSink":
+        return _StreamSink(text, self._new_parser, on_entities)
+
+    def _new_parser(self):
+        return CompactEntityParser() if self.response_format == "compact" else EntityStreamParser()
+
+    def _max_tokens(self, text: str) -> int:
+        expected = len(text) / 1000 * self._density * DENSITY_HEADROOM
+        tokens = self.min_tokens + math.ceil(expected * TOKENS_PER_ENTITY[self.response_format])
+        return min(self.max_tokens, tokens)
+
+    def _observe_density(self, text: str, entities: List[SensitiveEntity]) -> None:
+        if not text:
+            return
+        observed = len(entities) * 1000 / len(text)
+        smoothed = (1 - DENSITY_SMOOTHING) * self._density + DENSITY_SMOOTHING * observed
+        self._density = max(self.entity_density, smoothed)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        ceiling = min(self.backoff_max, self.backoff_base * (2**attempt))
+        return random.uniform(ceiling / 2, ceiling)
+
+    def _parse_entities(
+        self, response: httpx.Response, max_tokens: int
+    ) -> Optional[Tuple[List[SensitiveEntity], bool]]:
+        data = response.json()
+        alternative = _alternative(data)
+        completion_tokens = _completion_tokens(data)
+        if completion_tokens:
+            GPT_COMPLETION_TOKENS.inc(completion_tokens)
+        truncated = alternative.get("status") == TRUNCATED_STATUS or completion_tokens >= max_tokens
+
         entities_field = data.get("entities")
+        if entities_field:
+            items = entities_field
+            if not isinstance(items, list):
+                items = _safe_json_load(entities_field).get("entities")
+            return (_entities_from_items(items), truncated) if items else None
 
-        payload = entities_field or text_payload
-        if not payload:
-            return []
+        text_payload = alternative.get("message", {}).get("text")
+        if text_payload is None:
+            return None
+        if self.response_format == "compact":
+            parser = CompactEntityParser()
+            entities = parser.feed(text_payload)
+            if not truncated:
+                entities.extend(parser.finish())
+            return entities, truncated
 
-        parsed = _safe_json_load(payload)
-        if not parsed:
-            return []
+        if not text_payload:
+            return None
+        if not truncated:
+            parsed = _safe_json_load(text_payload)
+            if parsed:
+                return _entities_from_items(parsed.get("entities", [])), truncated
+        entities = EntityStreamParser().feed(text_payload.strip("` \n"))
+        if not entities and not truncated:
+            return None
+        return entities, truncated
 
-        entities = []
-        for item in parsed.get("entities", []):
-            try:
-                entities.append(
-                    SensitiveEntity(
-                        type=item.get("type", "UNKNOWN"),
-                        text=item.get("text", ""),
-                        start=int(item.get("start", 0)) + offset,
-                        end=int(item.get("end", 0)) + offset,
-                    )
-                )
-            except Exception:
-                continue
-        return entities
+    def _cache_key(self, chunk: str) -> Optional[str]:
+        if self.cache is None:
+            return None
+        return DetectionCache.make_key(chunk, self._model_uri(), PROMPT_VERSIONS[self.response_format])
+
+    def _model_uri(self) -> str:
+        return self.model_uri or (f"gpt://{self.folder_id}/yandexgpt" if self.folder_id else "")
 
-    def _build_request_body(self, chunk: str) -> dict:
-        model_uri = self.model_uri or (f"gpt://{self.folder_id}/yandexgpt" if self.folder_id else "")
+    def _build_request_body(self, chunk: str, max_tokens: int) -> dict:
         return {
-            "modelUri": model_uri,
-            "completionOptions": {"stream": False, "temperature": 0.1, "maxTokens": 1000},
+            "modelUri": self._model_uri(),
+            "completionOptions": {"stream": self.stream, "temperature": 0.1, "maxTokens": max_tokens},
             "messages": [
                 {"role": "system", "text": "Ты извлекаешь сущности из текста."},
-                {"role": "user", "text": PROMPT_TEMPLATE.format(payload=chunk)},
+                {"role": "user", "text": PROMPT_TEMPLATES[self.response_format].format(payload=chunk)},
             ],
         }
 
@@ -148,13 +507,156 @@ class YandexGPTClient:
         return headers
 
 
-def _chunk_text(text: str, chunk_size: int):
-    start = 0
-    length = len(text)
-    while start < length:
-        end = min(start + chunk_size, length)
-        yield text[start:end], start
-        start = end
+class _Progress:
+    def __init__(self, callback: Optional[ProgressCallback], total: int):
+        self.callback = callback
+        self.total = total
+        self.done = 0
+
+    def emit(self, event: str, data: Dict[str, Any]) -> None:
+        if self.callback is not None:
+            self.callback(event, data)
+
+    def entities(self, entities: List[SensitiveEntity], offset: int = 0) -> None:
+        if entities:
+            self.emit("entities", {"entities": [asdict(entity) for entity in _shift_entities(entities, offset)]})
+
+    def entity_sink(self, offset: int) -> Optional[EntityCallback]:
+        if self.callback is None:
+            return None
+        return lambda entities: self.entities(entities, offset)
+
+    def chunk_done(self, offset: int, length: int, outcome: str, found: int) -> None:
+        self.done += 1
+        self.emit(
+            "chunk",
+            {
+                "offset": offset,
+                "length": length,
+                "outcome": outcome,
+                "entities": found,
+                "done": self.done,
+                "total": self.total,
+            },
+        )
+
+
+def is_degraded(logs: List[Dict[str, Any]]) -> bool:
+    return any(log.get("direction") == "degraded" for log in logs)
+
+
+class _StreamSink:
+    def __init__(self, text: str, new_parser: Callable[[], Any], on_entities: EntityCallback):
+        self.text = text
+        self.new_parser = new_parser
+        self.parser = new_parser()
+        self.on_entities = on_entities
+        self.emitted: Set[Tuple[str, int, int]] = set()
+
+    def __call__(self, snapshot: str) -> None:
+        self._emit(self.parser.feed_snapshot(snapshot))
+
+    def restart(self) -> None:
+        self.parser = self.new_parser()
+
+    def finish(self) -> None:
+        self._emit(self.parser.finish())
+
+    def forward(self, entities: List[SensitiveEntity]) -> None:
+        fresh = []
+        for entity in entities:
+            key = (entity.type, entity.start, entity.end)
+            if key not in self.emitted:
+                self.emitted.add(key)
+                fresh.append(entity)
+        if fresh:
+            self.on_entities(fresh)
+
+    def _emit(self, entities: List[SensitiveEntity]) -> None:
+        if entities:
+            entities, _ = reconcile_entities(self.text, entities)
+            self.forward(entities)
+
+
+def _shifted_sink(on_entities: Optional[EntityCallback], offset: int) -> Optional[EntityCallback]:
+    if on_entities is None or not offset:
+        return on_entities
+    return lambda entities: on_entities(_shift_entities(entities, offset))
+
+
+def _shift_entities(entities: List[SensitiveEntity], offset: int) -> List[SensitiveEntity]:
+    return [
+        SensitiveEntity(type=entity.type, text=entity.text, start=entity.start + offset, end=entity.end + offset)
+        for entity in entities
+    ]
+
+
+def _alternative(data: Dict[str, Any]) -> Dict[str, Any]:
+    alternatives = data.get("result", {}).get("alternatives") or [{}]
+    return alternatives[0]
+
+
+def _alternative_text(data: Dict[str, Any]) -> Optional[str]:
+    return _alternative(data).get("message", {}).get("text")
+
+
+def _completion_tokens(data: Dict[str, Any]) -> int:
+    try:
+        return int(data.get("result", {}).get("usage", {}).get("completionTokens", 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _entities_from_items(items: Any) -> List[SensitiveEntity]:
+    entities = []
+    for item in items if isinstance(items, list) else []:
+        try:
+            entities.append(
+                SensitiveEntity(
+                    type=item.get("type", "UNKNOWN"),
+                    text=item.get("text", ""),
+                    start=int(item.get("start", 0)),
+                    end=int(item.get("end", 0)),
+                )
+            )
+        except Exception:
+            continue
+    return entities
+
+
+def _stream_line_text(line: str) -> Optional[str]:
+    try:
+        data = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    return _alternative_text(data) if isinstance(data, dict) else None
+
+
+def _final_stream_payload(lines: List[str]) -> bytes:
+    if not lines:
+        return b""
+    try:
+        json.loads(lines[-1])
+        return lines[-1].encode("utf-8")
+    except json.JSONDecodeError:
+        return "\n".join(lines).encode("utf-8")
+
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
 
 
 def _safe_json_load(payload: Any) -> Dict[str, Any]:
@@ -0,0 +1,135 @@
+import random
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, List
+
+from docx import Document
+from PIL import Image, ImageDraw, ImageFont
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from app.services.exporter import PDF_FONT_CANDIDATES, PDF_FONT_SIZE, PDF_LINE_HEIGHT, pdf_font
+from app.services.requisites import INN10_WEIGHTS, checksum
+
+KINDS = ("docx", "pdf", "scan")
+LINES_PER_PAGE = 40
+SCAN_SIZE = (1240, 1754)
+
+FIRST_NAMES = ("Иван", "Пётр", "Анна", "Мария", "Сергей", "Ольга", "Дмитрий", "Елена", "Алексей", "Наталья")
+LAST_NAMES = ("Иванов", "Петров", "Смирнов", "Кузнецов", "Попов", "Соколов", "Лебедев", "Козлов", "Новиков", "Морозов")
+FILLER = (
+    "Стороны договорились о порядке исполнения обязательств по настоящему договору.",
+    "Оплата производится в течение десяти рабочих дней с момента подписания акта.",
+    "Исполнитель обязуется предоставить отчёт о проделанной работе до конца квартала.",
+    "Все споры разрешаются путём переговоров, а при недостижении согласия в суде.",
+    "Настоящее соглашение вступает в силу с даты его подписания обеими сторонами.",
+)
+
+
+@dataclass
+class CorpusDocument:
+    path: Path
+    kind: str
+    pages: int
+    planted: List[str] = field(default_factory=list)
+
+    @property
+    def content_type(self) -> str:
+        return {
+            "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            "pdf": "application/pdf",
+            "scan": "image/png",
+        }[self.kind]
+
+
+def generate_corpus(
+    target_dir: Path,
+    kinds: Iterable[str] = KINDS,
+    pages: Iterable[int] = (1, 5, 20),
+    docs_per_size: int = 2,
+    seed: int = 0,
+) -> List[CorpusDocument]:
+    target_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    documents = []
+    for kind in kinds:
+        for page_count in pages:
+            for index in range(docs_per_size):
+                lines, planted = _document_lines(rng, page_count if kind != "scan" else 1)
+                suffix = "png" if kind == "scan" else kind
+                path = target_dir / f"{kind}_{page_count:03d}p_{index}.{suffix}"
+                WRITERS[kind](path, lines)
+                documents.append(CorpusDocument(path=path, kind=kind, pages=page_count, planted=planted))
+    return documents
+
+
+def _document_lines(rng: random.Random, pages: int):
+    lines, planted = [], []
+    for _ in range(pages * LINES_PER_PAGE):
+        roll = rng.random()
+        if roll < 0.08:
+            value = f"{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)}"
+            lines.append(f"Представитель: {value}")
+        elif roll < 0.12:
+            value = _inn10(rng)
+            lines.append(f"ИНН {value}")
+        elif roll < 0.16:
+            value = f"+7 (9{rng.randint(10, 99)}) {rng.randint(100, 999)}-{rng.randint(10, 99)}-{rng.randint(10, 99)}"
+            lines.append(f"тел. {value}")
+        elif roll < 0.19:
+            value = f"user{rng.randint(1000, 9999)}@example.ru"
+            lines.append(f"e-mail: {value}")
+        else:
+            lines.append(rng.choice(FILLER))
+            continue
+        planted.append(value)
+    return lines, planted
+
+
+def _inn10(rng: random.Random) -> str:
+    digits = "".join(str(rng.randint(0, 9)) for _ in range(9))
+    return digits + str(checksum(digits, INN10_WEIGHTS))
+
+
+def _write_docx(path: Path, lines: List[str]) -> None:
+    document = Document()
+    for index, line in enumerate(lines):
+        document.add_paragraph(line)
+        if (index + 1) % LINES_PER_PAGE == 0 and index + 1 < len(lines):
+            document.add_page_break()
+    document.save(path)
+
+
+def _write_pdf(path: Path, lines: List[str]) -> None:
+    font_name = pdf_font()
+    pdf = canvas.Canvas(str(path), pagesize=A4)
+    width, height = A4
+    for start in range(0, len(lines), LINES_PER_PAGE):
+        pdf.setFont(font_name, PDF_FONT_SIZE)
+        y = height - 40
+        for line in lines[start : start + LINES_PER_PAGE]:
+            pdf.drawString(40, y, line)
+            y -= PDF_LINE_HEIGHT * 1.2
+        pdf.showPage()
+    pdf.save()
+
+
+def _write_scan(path: Path, lines: List[str]) -> None:
+    image = Image.new("L", SCAN_SIZE, color=255)
+    draw = ImageDraw.Draw(image)
+    font = _scan_font()
+    y = 80
+    for line in lines:
+        draw.text((80, y), line, fill=0, font=font)
+        y += 40
+    image.save(path, dpi=(150, 150))
+
+
+def _scan_font():
+    for candidate in PDF_FONT_CANDIDATES:
+        if Path(candidate).exists():
+            return ImageFont.truetype(candidate, 26)
+    return ImageFont.load_default()
+
+
+WRITERS = {"docx": _write_docx, "pdf": _write_pdf, "scan": _write_scan}
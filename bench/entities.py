@@ -0,0 +1,217 @@
+import argparse
+import html
+import json
+import random
+import sqlite3
+import sys
+import time
+import tracemalloc
+from contextlib import closing
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.models.document_model import DocumentModel, TextBlock
+from app.models.entity_model import MaskingOptions, SensitiveEntity
+from app.models.entity_set import EntitySet
+from app.services import masking
+from app.services.result_store import ENTITY_CHUNK_SIZE
+
+TYPES = ("PERSON", "COMPANY", "PROJECT", "REKVIZIT")
+BLOCK_CHARS = 2000
+WORD = "абвгдежзиклмнопрстуфхцчшщэюя"
+LEGACY_TABLE = (
+    "CREATE TABLE entities (file_id TEXT NOT NULL, position INTEGER NOT NULL, type TEXT NOT NULL,"
+    " text TEXT NOT NULL, start INTEGER NOT NULL, end INTEGER NOT NULL, PRIMARY KEY (file_id, position))"
+)
+CHUNK_TABLE = (
+    "CREATE TABLE entity_chunks (file_id TEXT NOT NULL, position INTEGER NOT NULL, data BLOB NOT NULL,"
+    " PRIMARY KEY (file_id, position))"
+)
+
+
+@dataclass
+class LegacyEntity:
+    type: str
+    text: str
+    start: int
+    end: int
+
+
+LegacyPart = Tuple[str, Optional[LegacyEntity], bool, bool]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    document, spans = _synthetic(args.entities, args.seed)
+    options = MaskingOptions()
+
+    texts = [document.slice(start, end) for start, end, _ in spans]
+    legacy = [LegacyEntity(span[2], text, span[0], span[1]) for span, text in zip(spans, texts)]
+    current = [SensitiveEntity(span[2], text, span[0], span[1]) for span, text in zip(spans, texts)]
+    random.Random(args.seed).shuffle(legacy)
+    random.Random(args.seed).shuffle(current)
+
+    results = {
+        "legacy": _measure(args.repeat, lambda: _legacy_path(document, legacy, options)),
+        "entity_set": _measure(args.repeat, lambda: _entity_set_path(document, current, options)),
+    }
+    results["speedup"] = round(results["legacy"]["seconds"] / results["entity_set"]["seconds"], 2)
+    results["memory_ratio"] = round(results["legacy"]["peak_mb"] / max(results["entity_set"]["peak_mb"], 1e-6), 2)
+
+    print(json.dumps({"entities": args.entities, "chars": document.length, **results}, indent=2))
+    return 0
+
+
+def _legacy_path(document: DocumentModel, entities: List[LegacyEntity], options: MaskingOptions) -> None:
+    masked = list(_legacy_masked_blocks(document, entities, options))
+    highlighted = list(_legacy_highlight_blocks(document, entities))
+    with closing(sqlite3.connect(":memory:")) as conn:
+        conn.execute(LEGACY_TABLE)
+        conn.executemany(
+            "INSERT INTO entities (file_id, position, type, text, start, end) VALUES ('bench', ?, ?, ?, ?, ?)",
+            (
+                (position, entity.type, entity.text, entity.start, entity.end)
+                for position, entity in enumerate(entities)
+            ),
+        )
+        rows = conn.execute("SELECT type, text, start, end FROM entities WHERE file_id = 'bench' ORDER BY position")
+        restored = [LegacyEntity(*row) for row in rows]
+    assert masked and highlighted and len(restored) == len(entities)
+
+
+def _entity_set_path(document: DocumentModel, entities: List[SensitiveEntity], options: MaskingOptions) -> None:
+    entity_set = EntitySet.from_entities(entities)
+    masked = masking.mask_blocks(document, entity_set, options)
+    highlighted = list(masking.highlight_blocks(document, entity_set))
+    with closing(sqlite3.connect(":memory:")) as conn:
+        conn.execute(CHUNK_TABLE)
+        conn.executemany(
+            "INSERT INTO entity_chunks (file_id, position, data) VALUES ('bench', ?, ?)",
+            (
+                (position, entity_set.slice(low, low + ENTITY_CHUNK_SIZE).to_bytes())
+                for position, low in enumerate(range(0, len(entity_set), ENTITY_CHUNK_SIZE))
+            ),
+        )
+        restored = EntitySet.concat(
+            [
+                EntitySet.from_bytes(row[0])
+                for row in conn.execute("SELECT data FROM entity_chunks WHERE file_id = 'bench' ORDER BY position")
+            ]
+        )
+    assert masked and highlighted and len(restored) == len(entities)
+
+
+# Masking and highlighting as they worked before EntitySet: entities are re-sorted on every
+# call and each part keeps a reference to its entity object.
+def _legacy_masked_blocks(
+    document: DocumentModel, entities: List[LegacyEntity], options: MaskingOptions
+) -> Iterator[str]:
+    for parts in _legacy_block_parts(document, entities):
+        yield "".join(_legacy_mask_part(options, *part) for part in parts)
+
+
+def _legacy_highlight_blocks(document: DocumentModel, entities: List[LegacyEntity]) -> Iterator[str]:
+    for parts in _legacy_block_parts(document, entities):
+        yield "".join(_legacy_highlight_part(text, entity) for text, entity, _, _ in parts)
+
+
+def _legacy_block_parts(document: DocumentModel, entities: List[LegacyEntity]) -> Iterator[List[LegacyPart]]:
+    spans = []
+    cursor = 0
+    for entity in sorted(entities, key=lambda item: (item.start, item.end)):
+        if entity.start < cursor or entity.end <= entity.start:
+            continue
+        spans.append(entity)
+        cursor = entity.end
+    span_index = 0
+
+    for block in document.blocks:
+        block_start = block.start_offset
+        block_end = block_start + len(block.text)
+        cursor = block_start
+        parts: List[LegacyPart] = []
+
+        while span_index < len(spans) and spans[span_index].start < block_end:
+            entity = spans[span_index]
+            start = max(entity.start, block_start)
+            end = min(entity.end, block_end)
+            if start > cursor:
+                parts.append((block.text[cursor - block_start : start - block_start], None, False, False))
+            if end > start:
+                text = block.text[start - block_start : end - block_start]
+                parts.append((text, entity, start == entity.start, end == entity.end))
+            cursor = max(cursor, end)
+            if entity.end > block_end:
+                break
+            span_index += 1
+
+        if cursor < block_end:
+            parts.append((block.text[cursor - block_start :], None, False, False))
+        yield parts
+
+
+def _legacy_mask_part(
+    options: MaskingOptions, text: str, entity: Optional[LegacyEntity], first: bool, last: bool
+) -> str:
+    if entity is None:
+        return text
+    if first and last:
+        return options.render(entity.type, entity.end - entity.start)
+    if options.style == "tags":
+        return options.render(entity.type, entity.end - entity.start) if first else ""
+    return "*" * len(text)
+
+
+def _legacy_highlight_part(text: str, entity: Optional[LegacyEntity]) -> str:
+    if entity is None:
+        return html.escape(text)
+    css_class = masking.CLASS_MAP.get(entity.type.upper(), "entity-default")
+    return f'<span class="{css_class}">{html.escape(text)}</span>'
+
+
+def _measure(repeat: int, run: Callable[[], None]) -> Dict[str, float]:
+    run()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        run()
+    seconds = (time.perf_counter() - started) / repeat
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": round(seconds, 4), "peak_mb": round(peak / 1024 / 1024, 2)}
+
+
+def _synthetic(count: int, seed: int) -> Tuple[DocumentModel, List[Tuple[int, int, str]]]:
+    rng = random.Random(seed)
+    words = []
+    spans = []
+    offset = 0
+    for _ in range(count):
+        filler = "".join(rng.choice(WORD) for _ in range(rng.randint(5, 30)))
+        words.append(f"{filler} ")
+        offset += len(filler) + 1
+        value = "".join(rng.choice(WORD) for _ in range(rng.randint(4, 16))).capitalize()
+        spans.append((offset, offset + len(value), rng.choice(TYPES)))
+        words.append(f"{value}. ")
+        offset += len(value) + 2
+
+    text = "".join(words)
+    blocks = [
+        TextBlock(page=None, text=text[start : start + BLOCK_CHARS], start_offset=start)
+        for start in range(0, len(text), BLOCK_CHARS)
+    ]
+    return DocumentModel.from_blocks(blocks), spans
+
+
+def _parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Microbenchmark of entity sorting, masking and serialization.")
+    parser.add_argument("--entities", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
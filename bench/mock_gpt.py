@@ -0,0 +1,155 @@
+import asyncio
+import json
+import random
+import re
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+PAYLOAD_MARKER = "Текст:\n"
+NAME_RE = re.compile(r"\b[А-ЯЁ][а-яё]+ [А-ЯЁ][а-яё]+(?: [А-ЯЁ][а-яё]+)?\b")
+WORD_RE = re.compile(r"\w{4,}")
+STREAM_PIECES = 8
+CHARS_PER_TOKEN = 4
+TYPE_CODES = {"PERSON": "P", "PROJECT": "J"}
+
+
+@dataclass
+class MockGPTConfig:
+    latency_ms: float = 200.0
+    jitter_ms: float = 50.0
+    error_rate: float = 0.0
+    entity_density: float = 0.02
+    seed: int = 0
+
+
+def create_app(config: MockGPTConfig) -> FastAPI:
+    app = FastAPI()
+    rng = random.Random(config.seed)
+    app.state.requests = 0
+    app.state.errors = 0
+    app.state.completion_tokens = 0
+    app.state.truncated = 0
+
+    @app.post("/foundationModels/v1/completion")
+    async def completion(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        delay = max(0.0, config.latency_ms + rng.uniform(-config.jitter_ms, config.jitter_ms)) / 1000
+        stream = bool(body.get("completionOptions", {}).get("stream"))
+        await asyncio.sleep(delay / STREAM_PIECES if stream else delay)
+
+        if rng.random() < config.error_rate:
+            app.state.errors += 1
+            return JSONResponse({"error": "mock overload"}, status_code=503, headers={"Retry-After": "0"})
+
+        prompt = body["messages"][-1]["text"]
+        instructions, _, chunk = prompt.rpartition(PAYLOAD_MARKER)
+        entities = _entities(chunk, config.entity_density, rng)
+        text = _render(entities, compact="|" in instructions)
+        max_chars = int(body.get("completionOptions", {}).get("maxTokens", 0)) * CHARS_PER_TOKEN
+        status = "ALTERNATIVE_STATUS_FINAL"
+        if max_chars and len(text) > max_chars:
+            text, status = text[:max_chars], "ALTERNATIVE_STATUS_TRUNCATED_FINAL"
+            app.state.truncated += 1
+        app.state.completion_tokens += len(text) // CHARS_PER_TOKEN
+        if stream:
+            return StreamingResponse(_stream(chunk, text, status, delay), media_type="application/json")
+        return _completion(chunk, text, status)
+
+    return app
+
+
+async def _stream(chunk: str, text: str, final_status: str, delay: float):
+    step = max(1, -(-len(text) // STREAM_PIECES))
+    for end in range(step, len(text) + step, step):
+        final = end >= len(text)
+        status = final_status if final else "ALTERNATIVE_STATUS_PARTIAL"
+        yield json.dumps(_completion(chunk, text[:end], status), ensure_ascii=False) + "\n"
+        if not final:
+            await asyncio.sleep(delay / STREAM_PIECES)
+
+
+def _completion(chunk: str, text: str, status: str) -> dict:
+    return {
+        "result": {
+            "alternatives": [{"message": {"role": "assistant", "text": text}, "status": status}],
+            "usage": {
+                "inputTextTokens": str(len(chunk) // CHARS_PER_TOKEN),
+                "completionTokens": str(len(text) // CHARS_PER_TOKEN),
+            },
+        }
+    }
+
+
+def _entities(chunk: str, density: float, rng: random.Random) -> List[dict]:
+    entities = [
+        {"type": "PERSON", "text": match.group(0), "start": match.start(), "end": match.end()}
+        for match in NAME_RE.finditer(chunk)
+    ]
+    for match in WORD_RE.finditer(chunk):
+        if rng.random() < density:
+            entities.append({"type": "PROJECT", "text": match.group(0), "start": match.start(), "end": match.end()})
+    return entities
+
+
+def _render(entities: List[dict], compact: bool) -> str:
+    if compact:
+        return "\n".join(f"{TYPE_CODES[item['type']]}|{item['start']}|{item['text']}" for item in entities)
+    return json.dumps({"entities": entities}, ensure_ascii=False)
+
+
+class MockGPTServer:
+    def __init__(self, config: MockGPTConfig, host: str = "127.0.0.1", port: Optional[int] = None):
+        self.config = config
+        self.host = host
+        self.port = port or _free_port(host)
+        self.app = create_app(config)
+        self._server = uvicorn.Server(uvicorn.Config(self.app, host=self.host, port=self.port, log_level="warning"))
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/foundationModels/v1/completion"
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._server.run, name="mock-gpt", daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Mock GPT server did not start")
+            time.sleep(0.05)
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.app.state.requests,
+            "errors": self.app.state.errors,
+            "completion_tokens": self.app.state.completion_tokens,
+            "truncated": self.app.state.truncated,
+        }
+
+    def __enter__(self) -> "MockGPTServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def _free_port(host: str) -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
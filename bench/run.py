@@ -0,0 +1,321 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+from bench.corpus import KINDS, CorpusDocument, generate_corpus
+from bench.mock_gpt import MockGPTConfig, MockGPTServer
+
+RESULTS_DIR = Path(__file__).parent / "results"
+SCENARIOS = ("services", "upload")
+POLL_INTERVAL_SECONDS = 0.02
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    work_dir = Path(tempfile.mkdtemp(prefix="masking-bench-"))
+    documents = generate_corpus(
+        work_dir / "corpus",
+        kinds=args.kinds,
+        pages=args.pages,
+        docs_per_size=args.docs_per_size,
+        seed=args.seed,
+    )
+    print(f"Corpus: {len(documents)} documents in {work_dir / 'corpus'}")
+
+    mock_config = MockGPTConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        entity_density=args.entity_density,
+        seed=args.seed,
+    )
+    with MockGPTServer(mock_config) as mock:
+        _configure_env(args, mock.url, work_dir / "temp")
+        scenarios = asyncio.run(_run_scenarios(args, documents))
+        mock_stats = mock.stats()
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "kinds": args.kinds,
+            "pages": args.pages,
+            "docs_per_size": args.docs_per_size,
+            "concurrency": args.concurrency,
+            "mock": vars(mock_config),
+            "detection_cache": args.cache,
+        },
+        "mock": mock_stats,
+        "scenarios": scenarios,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+    output = args.output or RESULTS_DIR / f"bench-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    _print_report(report)
+    print(f"Saved {output}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = compare(baseline, report, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+def _parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline throughput benchmark for the masking pipeline.")
+    parser.add_argument("--scenarios", type=_csv, default=list(SCENARIOS), help="services,upload")
+    parser.add_argument("--kinds", type=_csv, default=["docx", "pdf"], help=f"Subset of {','.join(KINDS)}")
+    parser.add_argument("--pages", type=lambda value: [int(item) for item in _csv(value)], default=[1, 5, 20])
+    parser.add_argument("--docs-per-size", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--entity-density", type=float, default=0.02)
+    parser.add_argument("--cache", action="store_true", help="Keep the detection cache enabled")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path, help="Compare against a previously saved report")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown")
+    args = parser.parse_args(argv)
+
+    unknown = set(args.kinds) - set(KINDS)
+    if unknown:
+        parser.error(f"Unknown kinds: {', '.join(sorted(unknown))}")
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+def _csv(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _configure_env(args: argparse.Namespace, api_url: str, temp_dir: Path) -> None:
+    os.environ.update(
+        {
+            "YANDEX_GPT_API_KEY": "bench",
+            "YANDEX_GPT_API_URL": api_url,
+            "YANDEX_GPT_MODEL_URI": "gpt://bench/yandexgpt",
+            "TEMP_DIR": str(temp_dir),
+            "GPT_BACKOFF_BASE_SECONDS": "0.05",
+            "GPT_BACKOFF_MAX_SECONDS": "0.5",
+            "DETECTION_CACHE_ENTRIES": os.environ.get("DETECTION_CACHE_ENTRIES", "2048") if args.cache else "0",
+            "DETECTION_CACHE_DISK": "false",
+        }
+    )
+
+
+async def _run_scenarios(args: argparse.Namespace, documents: List[CorpusDocument]) -> Dict[str, dict]:
+    from app.dependencies import gpt_client, settings
+    from app.main import app
+
+    results = {}
+    if "services" in args.scenarios:
+        await gpt_client.start()
+        try:
+            results["services"] = await _bench_services(documents, args.concurrency, settings, gpt_client)
+        finally:
+            await gpt_client.aclose()
+    if "upload" in args.scenarios:
+        results["upload"] = await _bench_upload(documents, args.concurrency, app)
+    return results
+
+
+async def _bench_services(documents: List[CorpusDocument], concurrency: int, settings, gpt_client) -> dict:
+    from app.models.entity_model import MaskingOptions
+    from app.models.entity_set import EntitySet
+    from app.services.chunking import block_boundaries
+    from app.services.document_parser import parse_document
+    from app.services.exporter import export_masked
+    from app.services.masking import mask_blocks
+    from app.services.pipeline import build_ocr_options
+
+    ocr_options = build_ocr_options(settings)
+    options = MaskingOptions(style=settings.mask_style)
+    target_dir = settings.temp_dir / "bench"
+    target_dir.mkdir(parents=True, exist_ok=True)
+
+    async def process(document: CorpusDocument, timings: Dict[str, float]) -> None:
+        started = time.perf_counter()
+        parsed = await asyncio.to_thread(parse_document, document.path, document.content_type, ocr_options)
+        timings["parse"] = time.perf_counter() - started
+
+        mark = time.perf_counter()
+        detected, _ = await gpt_client.detect_sensitive_data(parsed.full_text, block_boundaries(parsed))
+        entities = EntitySet.from_entities(detected)
+        timings["detect"] = time.perf_counter() - mark
+
+        mark = time.perf_counter()
+        masked_blocks = await asyncio.to_thread(mask_blocks, parsed, entities, options)
+        timings["mask"] = time.perf_counter() - mark
+
+        mark = time.perf_counter()
+        await asyncio.to_thread(
+            export_masked,
+            masked_blocks,
+            original_path=document.path,
+            target_dir=target_dir,
+            entities=entities,
+            options=options,
+            document=parsed,
+            ocr_options=ocr_options,
+        )
+        timings["export"] = time.perf_counter() - mark
+
+    return await _drive(documents, concurrency, process)
+
+
+async def _bench_upload(documents: List[CorpusDocument], concurrency: int, app) -> dict:
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+
+            async def process(document: CorpusDocument, timings: Dict[str, float]) -> None:
+                started = time.perf_counter()
+                response = await client.post(
+                    "/upload",
+                    files={"upload": (document.path.name, document.path.read_bytes(), document.content_type)},
+                    headers={"Accept": "application/json"},
+                )
+                response.raise_for_status()
+                timings["upload"] = time.perf_counter() - started
+
+                status_url = response.json()["status_url"]
+                while True:
+                    status = (await client.get(status_url)).json()
+                    if status["status"] == "failed":
+                        raise RuntimeError(status["error"])
+                    if status["status"] == "done":
+                        break
+                    await asyncio.sleep(POLL_INTERVAL_SECONDS)
+                timings["job"] = time.perf_counter() - started - timings["upload"]
+
+            return await _drive(documents, concurrency, process)
+
+
+async def _drive(documents: List[CorpusDocument], concurrency: int, process) -> dict:
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    samples: Dict[str, List[float]] = defaultdict(list)
+    by_kind: Dict[str, List[float]] = defaultdict(list)
+    errors: List[str] = []
+
+    async def run_one(document: CorpusDocument) -> None:
+        timings: Dict[str, float] = {}
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await process(document, timings)
+            except Exception as exc:  # noqa: BLE001
+                errors.append(f"{document.path.name}: {exc}")
+                return
+            total = time.perf_counter() - started
+        for stage, seconds in timings.items():
+            samples[stage].append(seconds)
+        samples["total"].append(total)
+        by_kind[document.kind].append(total)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run_one(document) for document in documents))
+    wall = time.perf_counter() - started
+
+    completed = len(samples["total"])
+    return {
+        "documents": len(documents),
+        "completed": completed,
+        "errors": errors,
+        "wall_seconds": round(wall, 3),
+        "docs_per_min": round(completed / wall * 60, 2) if wall else 0.0,
+        "latency": {stage: summarize(values) for stage, values in samples.items()},
+        "latency_by_kind": {kind: summarize(values) for kind, values in by_kind.items()},
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 4) if ordered else 0.0,
+        "p50": round(percentile(ordered, 50), 4),
+        "p95": round(percentile(ordered, 95), 4),
+        "p99": round(percentile(ordered, 99), 4),
+        "max": round(ordered[-1], 4) if ordered else 0.0,
+    }
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> List[str]:
+    regressions = []
+    for name, scenario in current["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        for stage, stats in scenario["latency"].items():
+            old = previous["latency"].get(stage, {}).get("p95")
+            if old and stats["p95"] > old * (1 + tolerance):
+                regressions.append(f"{name}.{stage} p95 {old:.3f}s -> {stats['p95']:.3f}s")
+        old_rate = previous.get("docs_per_min")
+        if old_rate and scenario["docs_per_min"] < old_rate * (1 - tolerance):
+            regressions.append(f"{name} docs/min {old_rate:.1f} -> {scenario['docs_per_min']:.1f}")
+
+    old_rss = baseline.get("peak_rss_mb")
+    if old_rss and current["peak_rss_mb"] > old_rss * (1 + tolerance):
+        regressions.append(f"peak RSS {old_rss:.0f}MB -> {current['peak_rss_mb']:.0f}MB")
+    return regressions
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def _print_report(report: dict) -> None:
+    for name, scenario in report["scenarios"].items():
+        print(
+            f"\n[{name}] {scenario['completed']}/{scenario['documents']} docs in {scenario['wall_seconds']}s,"
+            f" {scenario['docs_per_min']} docs/min, peak RSS {scenario['peak_rss_mb']} MB"
+        )
+        print(f"  {'stage':<10} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+        for stage, stats in scenario["latency"].items():
+            print(f"  {stage:<10} {stats['p50']:>8.3f} {stats['p95']:>8.3f} {stats['p99']:>8.3f} {stats['max']:>8.3f}")
+        for error in scenario["errors"]:
+            print(f"  error: {error}")
+    mock = report["mock"]
+    print(
+        f"\nMock GPT: {mock['requests']} requests, {mock['errors']} injected errors,"
+        f" {mock['completion_tokens']} output tokens, {mock['truncated']} truncated replies"
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())